@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import EmailOutbox, RevokedToken, UserProfile
 
 # Inline admin for UserProfile
 class UserProfileInline(admin.StackedInline):
@@ -43,4 +43,18 @@ class UserProfileAdmin(admin.ModelAdmin):
     def user_email(self, obj):
         return obj.user.email
     user_email.short_description = 'Email'
-    user_email.admin_order_field = 'user__email'
\ No newline at end of file
+    user_email.admin_order_field = 'user__email'
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('dedup_key', 'recipient', 'subject', 'status', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('dedup_key', 'recipient')
+    readonly_fields = ('dedup_key', 'recipient', 'subject', 'body', 'attempts', 'last_error', 'created_at', 'sent_at')
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'token_type', 'revoked_at', 'expires_at')
+    list_filter = ('token_type',)
+    search_fields = ('jti',)
+    readonly_fields = ('jti', 'token_type', 'revoked_at', 'expires_at')
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import is_revoked
+
+UserModel = get_user_model()
+
+# Authorization claims signed into the tokens issued at login/registration
+CLAIMS = ('is_staff', 'tutor_approved')
+CLAIMS_VERSION = 'claims_version'
+
+
+def _claims_version_key(user_id):
+    return f'claims-version:{user_id}'
+
+
+def get_claims_version(user_id):
+    """Return the version a user's token claims must carry to be trusted"""
+    key = _claims_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never comes back to a
+        # version older tokens were issued with
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_claims(user_id):
+    """Stop trusting the claims of every token issued to a user so far"""
+    try:
+        cache.incr(_claims_version_key(user_id))
+    except ValueError:
+        get_claims_version(user_id)
+
+
+def tokens_for_user(user):
+    """Return a refresh token, and through it an access token, carrying the user's claims"""
+    refresh = RefreshToken.for_user(user)
+    refresh['is_staff'] = user.is_staff
+    refresh['tutor_approved'] = user.profile.tutor_approved
+    refresh[CLAIMS_VERSION] = get_claims_version(user.pk)
+    return refresh
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Request user backed by the claims of a verified access token.
+
+    id, pk, is_staff and tutor_approved are read from the token. Any other
+    attribute, or use as a model instance (comparisons, ORM filters),
+    loads the User and its profile in one query on first access.
+    """
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, token):
+        # The user id claim is a string
+        user_id = UserModel._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        super().__init__(
+            lambda: UserModel._default_manager.select_related('profile').get(pk=user_id)
+        )
+        # Stored on the proxy itself, as LazyObject forwards setattr
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            is_staff=token['is_staff'],
+            tutor_approved=token['tutor_approved'],
+        )
+
+    def __bool__(self):
+        return True
+
+
+class VerifiedTokenCache:
+    """
+    LRU of recently verified access tokens.
+
+    A hot token is decoded and its signature checked at most once per
+    `ttl` seconds, and never trusted past its own expiry. Holds at most
+    `size` tokens.
+    """
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self.lock:
+            entry = self.tokens.get(raw_token)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at <= time.time():
+                del self.tokens[raw_token]
+                return None
+            self.tokens.move_to_end(raw_token)
+            return token
+
+    def set(self, raw_token, token):
+        expires_at = min(time.time() + self.ttl, token['exp'])
+        with self.lock:
+            self.tokens[raw_token] = (token, expires_at)
+            self.tokens.move_to_end(raw_token)
+            while len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+
+verified_tokens = VerifiedTokenCache(
+    ttl=settings.JWT_VERIFIED_TOKEN_CACHE_TTL,
+    size=settings.JWT_VERIFIED_TOKEN_CACHE_SIZE,
+)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts current authorization claims.
+
+    Tokens carrying claims at the user's current claims version
+    authenticate as a ClaimsUser without touching the database; other
+    tokens (issued before the claims changed, or without claims) load the
+    User as usual, as does every token unless JWT_TRUST_TOKEN_CLAIMS is
+    set (the claims versions need a cache shared by all processes).
+    Revoked tokens are rejected.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, token)
+        # Checked on every request, as cached tokens may be revoked since
+        if is_revoked(token):
+            raise InvalidToken('Token has been revoked.')
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get(CLAIMS_VERSION)
+        if (
+            settings.JWT_TRUST_TOKEN_CLAIMS
+            and user_id is not None
+            and version is not None
+            and all(claim in validated_token for claim in CLAIMS)
+            and version == get_claims_version(user_id)
+        ):
+            return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
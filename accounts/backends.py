@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Lower
+
+from core.hashing import get_hashing_executor
+
+UserModel = get_user_model()
+
+
+def normalize_email(email):
+    """Normalized form of an email address, as matched by EmailBackend"""
+    return (email or '').strip().lower()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with an email address and password.
+
+    The user is found in one query on LOWER(email), which the
+    accounts_user_email_lower_idx expression index covers, and the
+    password is verified once. When no user matches, a password is hashed
+    anyway, so a failed login costs the same whether or not the email is
+    registered. Hashing runs in the hashing executor's worker processes,
+    which also rehash a correct password stored with outdated settings.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        executor = get_hashing_executor()
+        try:
+            # The profile is read for the token claims issued at login
+            user = UserModel._default_manager.select_related('profile').alias(
+                email_lower=Lower('email')
+            ).get(email_lower=normalize_email(email))
+        except (UserModel.DoesNotExist, UserModel.MultipleObjectsReturned):
+            # Same work as a wrong password (see ModelBackend.authenticate)
+            executor.make_password(password)
+            return None
+
+        if executor.check_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,113 @@
+import random
+import time
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.serializers import UserLoginSerializer
+
+PASSWORD = 'bench-password'
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_login(email, password):
+    """The login flow before EmailBackend: email lookup, then authenticate by username"""
+    try:
+        user = User.objects.get(email=email.lower().strip())
+    except User.DoesNotExist:
+        return None
+    if not user.is_active:
+        return None
+    return authenticate(username=user.username, password=password)
+
+
+def email_login(email, password):
+    serializer = UserLoginSerializer(data={'email': email, 'password': password})
+    return serializer.validated_data['user'] if serializer.is_valid() else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare login throughput before and after the email authentication '
+        'backend. Sample users are created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Users in the sample')
+        parser.add_argument('--logins', type=int, default=500, help='Timed logins per path')
+        parser.add_argument(
+            '--hasher',
+            choices=['md5', 'default'],
+            default='md5',
+            help='Password hasher for the sample; md5 isolates the lookup cost, '
+                 'default measures the configured PBKDF2 cost as well',
+        )
+
+    def handle(self, *args, **options):
+        hashers = None
+        if options['hasher'] == 'md5':
+            hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        try:
+            with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                with transaction.atomic():
+                    self.run(options['users'], options['logins'])
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, users, logins):
+        started = time.perf_counter()
+        emails = self.create_sample(users)
+        self.stdout.write(f'Created {users} users in {time.perf_counter() - started:.1f}s')
+
+        rng = random.Random(0)
+        sample = [rng.choice(emails) for _ in range(logins)]
+        # Mixed case, as users type it
+        sample = [email.title() if i % 2 else email for i, email in enumerate(sample)]
+
+        for label, login in (('Before', legacy_login), ('After', email_login)):
+            if login(sample[0], PASSWORD) is None:
+                self.stderr.write(f'{label}: sample login failed')
+            rate, queries = self.measure(login, sample, PASSWORD)
+            self.stdout.write(
+                f'{label:<6}: {rate:8.0f} logins/s, {queries} queries per login'
+            )
+
+        # Failed logins should cost the same whatever the reason
+        for label, emails_tried, password in (
+            ('wrong password', sample, 'wrong-password'),
+            ('unknown email', [f'nobody-{i}@example.com' for i in range(logins)], PASSWORD),
+        ):
+            rate, _ = self.measure(email_login, emails_tried, password)
+            self.stdout.write(f'Failed, {label:<14}: {1000 / rate:.3f} ms per login')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def create_sample(self, users, batch_size=5000):
+        # One shared hash keeps seeding fast; bulk_create skips the
+        # post_save signals, so no welcome emails are queued
+        password = make_password(PASSWORD)
+        emails = [f'bench-login-{i}@example.com' for i in range(users)]
+        User.objects.bulk_create(
+            [User(username=email, email=email, password=password) for email in emails],
+            batch_size=batch_size
+        )
+        return emails
+
+    def measure(self, login, emails, password):
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            login(emails[0], password)
+        started = time.perf_counter()
+        for email in emails:
+            login(email, password)
+        elapsed = time.perf_counter() - started
+        return len(emails) / elapsed, len(queries)
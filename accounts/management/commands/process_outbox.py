@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import MAX_ATTEMPTS, process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued notification emails from the outbox through EMAIL_BACKEND'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of messages claimed and sent per batch',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Give up on a message after this many failed sends',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling the outbox when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls of an empty outbox with --loop',
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        started = time.monotonic()
+
+        while True:
+            sent, failed = process_outbox(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+            )
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total_sent} emails ({total_failed} failed attempts) in {elapsed:.2f}s'
+        ))
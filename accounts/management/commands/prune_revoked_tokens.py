@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts.revocation import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked-token records of tokens that have expired anyway'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of records deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired revoked tokens'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['is_tutor', 'tutor_approved', '-date_joined', '-id'], name='profile_tutor_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_tutor_queue_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # auth_user belongs to django.contrib.auth, so the keyset pagination
+        # index for the admin user list is created here
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS accounts_user_joined_id_idx '
+                'ON auth_user (date_joined DESC, id DESC);',
+            reverse_sql='DROP INDEX IF EXISTS accounts_user_joined_id_idx;',
+        ),
+    ]
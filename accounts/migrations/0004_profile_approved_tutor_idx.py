@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_date_joined_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('tutor_approved', True)), fields=['academic_year', 'user'], name='profile_approved_tutor_idx'),
+        ),
+    ]
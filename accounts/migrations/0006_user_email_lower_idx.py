@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_emailoutbox'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # auth_user belongs to django.contrib.auth, so the index EmailBackend
+        # looks users up by is created here
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS accounts_user_email_lower_idx '
+                'ON auth_user (LOWER(email));',
+            reverse_sql='DROP INDEX IF EXISTS accounts_user_email_lower_idx;',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=64, unique=True)),
+                ('token_type', models.CharField(max_length=16)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='revoked_token_expiry_idx'), models.Index(fields=['revoked_at'], name='revoked_token_recent_idx')],
+            },
+        ),
+    ]
@@ -28,6 +28,30 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.academic_year}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+    
+    def has_changed(self, *fields):
+        """Check whether any of the fields differ from their saved values"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            field not in loaded or getattr(self, field) != loaded[field]
+            for field in fields
+        )
+    
     def apply_as_tutor(self):
         """Apply to become a tutor"""
         if not self.is_tutor:
@@ -53,15 +77,76 @@ class UserProfile(models.Model):
         ordering = ['-date_joined']
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
+        indexes = [
+            # Keyset pagination of the pending tutor applications queue
+            models.Index(
+                fields=['is_tutor', 'tutor_approved', '-date_joined', '-id'],
+                name='profile_tutor_queue_idx'
+            ),
+            # Tutor discovery: only approved tutors, optionally by academic year
+            models.Index(
+                fields=['academic_year', 'user'],
+                condition=models.Q(tutor_approved=True),
+                name='profile_approved_tutor_idx'
+            ),
+        ]
+
+class EmailOutbox(models.Model):
+    """Notification email written in the same transaction as the change it reports"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    # One message per key, e.g. "welcome:<user id>"; enqueuing it again is a no-op
+    dedup_key = models.CharField(max_length=200, unique=True)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # Not picked up by the worker before this time (retry backoff or a worker's lease)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.dedup_key} -> {self.recipient} ({self.status})"
+    
+    class Meta:
+        verbose_name = 'Outbox Email'
+        verbose_name_plural = 'Outbox Emails'
+        indexes = [
+            # The worker's queue: due pending messages in order
+            models.Index(fields=['status', 'available_at', 'id'], name='outbox_due_idx'),
+        ]
+
+class RevokedToken(models.Model):
+    """JWT revoked before its expiry, by logout or refresh rotation"""
+    jti = models.CharField(max_length=64, unique=True)
+    token_type = models.CharField(max_length=16)
+    # The token is rejected anyway once expired, so the row can be pruned
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.token_type} {self.jti}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='revoked_token_expiry_idx'),
+            # Other processes read recent revocations into their filters
+            models.Index(fields=['revoked_at'], name='revoked_token_recent_idx'),
+        ]
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """Signal to create user profile when a new user is created"""
-    if created:
-        UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Signal to save user profile when user is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+    # A profile attached to the user before its first save (see
+    # registration) is saved by the caller, so it is written once
+    if created and not User.profile.related.is_cached(instance):
+        UserProfile.objects.create(user=instance)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# A worker owns the batch it claimed for this long; if it dies mid-batch the
+# messages become due again afterwards (delivery is at-least-once)
+LEASE_SECONDS = 5 * 60
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+
+
+def enqueue_email(dedup_key, recipient, subject, body):
+    """
+    Add a message to the outbox unless one with the same key already exists.
+
+    Call it inside the transaction making the change the email reports, so
+    the message is stored if and only if that change commits.
+    """
+    enqueue_emails([
+        EmailOutbox(dedup_key=dedup_key, recipient=recipient, subject=subject, body=body)
+    ])
+
+
+def enqueue_emails(messages):
+    """Add unsaved EmailOutbox messages in one statement, skipping keys already queued"""
+    EmailOutbox.objects.bulk_create(messages, ignore_conflicts=True)
+
+
+def welcome_email(user):
+    """The welcome message for a new user, as an unsaved outbox message"""
+    return EmailOutbox(
+        dedup_key=f"welcome:{user.pk}",
+        recipient=user.email,
+        subject="Welcome to Campus Connect!",
+        body=(
+            f"Hello {user.first_name}, welcome to Campus Connect!\n"
+            f"Your account has been created successfully.\n"
+        ),
+    )
+
+
+def claim_batch(batch_size):
+    """Lease up to batch_size due messages to this worker and return them"""
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(status='pending', available_at__lte=now)
+    ids = list(due.order_by('available_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    # Another worker may have claimed some of them in the meantime; the
+    # lease time, unique to this claim, tells ours apart
+    lease_until = now + timezone.timedelta(seconds=LEASE_SECONDS)
+    due.filter(id__in=ids).update(available_at=lease_until)
+    return list(EmailOutbox.objects.filter(
+        id__in=ids, status='pending', available_at=lease_until
+    ).order_by('id'))
+
+
+def process_outbox(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Send one batch of due messages through EMAIL_BACKEND.
+
+    Failed messages are retried with exponential backoff and given up on
+    after max_attempts. Returns (sent, failed) counts for the batch.
+    """
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent, failed = _send(messages)
+
+    now = timezone.now()
+    for message in sent:
+        message.status = 'sent'
+        message.sent_at = now
+        message.attempts += 1
+    for message in failed:
+        message.attempts += 1
+        if message.attempts >= max_attempts:
+            message.status = 'failed'
+        else:
+            message.available_at = now + timezone.timedelta(
+                seconds=RETRY_BASE_SECONDS * 2 ** (message.attempts - 1)
+            )
+
+    EmailOutbox.objects.bulk_update(
+        sent + failed, ['status', 'sent_at', 'attempts', 'available_at', 'last_error']
+    )
+    return len(sent), len(failed)
+
+
+def _send(messages):
+    # One connection for the whole batch; failing to open it fails them all
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Opening the email connection failed: %s', exc)
+        for message in messages:
+            message.last_error = str(exc)
+        return [], list(messages)
+
+    sent, failed = [], []
+    try:
+        for message in messages:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[message.recipient],
+                connection=connection,
+            )
+            try:
+                email.send()
+            except Exception as exc:
+                logger.warning('Sending outbox email %s failed: %s', message.dedup_key, exc)
+                message.last_error = str(exc)
+                failed.append(message)
+            else:
+                sent.append(message)
+    finally:
+        connection.close()
+    return sent, failed
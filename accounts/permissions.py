@@ -1,5 +1,13 @@
 from rest_framework import permissions
 
+from .authentication import ClaimsUser
+
+def is_approved_tutor(user):
+    """Whether a user is an approved tutor, read from token claims when present"""
+    if isinstance(user, ClaimsUser):
+        return user.tutor_approved
+    return hasattr(user, 'profile') and user.profile.tutor_approved
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
     Custom permission to only allow owners of an object to edit it.
@@ -31,8 +39,7 @@ class IsTutor(permissions.BasePermission):
         return bool(
             request.user and 
             request.user.is_authenticated and
-            hasattr(request.user, 'profile') and
-            request.user.profile.tutor_approved
+            is_approved_tutor(request.user)
         )
 
 class IsNotTutor(permissions.BasePermission):
@@ -45,10 +52,10 @@ class IsNotTutor(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
-        if not hasattr(request.user, 'profile'):
+        if not isinstance(request.user, ClaimsUser) and not hasattr(request.user, 'profile'):
             return False
         
-        return not request.user.profile.tutor_approved
+        return not is_approved_tutor(request.user)
 
 class IsAdminOrSelf(permissions.BasePermission):
     """
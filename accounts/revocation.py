@@ -0,0 +1,193 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+# Revocations committed this long after their revoked_at are still picked
+# up by other processes
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives.
+
+    Sized for `capacity` keys at `error_rate` false positives; memory does
+    not grow with the keys added, only the false positive rate does.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """
+    Revoked token ids, checked in memory in front of the RevokedToken table.
+
+    Every unexpired revocation is in a Bloom filter, so a token that was
+    never revoked, the usual case, is cleared without a query. A filter
+    hit is confirmed against the table once and the answer kept in a
+    bounded LRU. Revocations made by other processes are read into the
+    filter at most every `sync_interval` seconds; when it fills up past
+    its capacity, it is rebuilt from the unexpired rows. Memory is the
+    filter's fixed size plus the LRU, however many tokens are issued.
+    """
+
+    def __init__(self, capacity, error_rate, cache_size, sync_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.cache_size = cache_size
+        self.sync_interval = sync_interval
+        self.bloom = None
+        self.confirmed = OrderedDict()
+        self.synced_at = 0
+        self.synced_until = None
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+
+    def _load(self):
+        """Rebuild the filter from the unexpired revocations"""
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        synced_until = timezone.now()
+        jtis = RevokedToken.objects.filter(
+            expires_at__gt=synced_until
+        ).values_list('jti', flat=True)
+        for jti in jtis.iterator(chunk_size=10000):
+            bloom.add(jti)
+        with self.lock:
+            self.bloom = bloom
+            self.confirmed.clear()
+        self.synced_until = synced_until
+        self.synced_at = time.monotonic()
+
+    def _sync(self):
+        """Add revocations made since the last sync, by any process"""
+        synced_until = timezone.now()
+        # Read before taking the lock, which is_revoked() waits on
+        jtis = list(RevokedToken.objects.filter(
+            revoked_at__gte=self.synced_until - SYNC_OVERLAP
+        ).values_list('jti', flat=True))
+        with self.lock:
+            for jti in jtis:
+                # A cached "not revoked" may predate the revocation
+                self.confirmed.pop(jti, None)
+                if jti not in self.bloom:
+                    self.bloom.add(jti)
+            full = self.bloom.count > self.capacity
+        self.synced_until = synced_until
+        self.synced_at = time.monotonic()
+        if full:
+            self._load()
+
+    def _refresh(self):
+        if self.bloom is None:
+            with self.sync_lock:
+                if self.bloom is None:
+                    self._load()
+        elif time.monotonic() - self.synced_at >= self.sync_interval:
+            # One thread syncs; the others carry on with the current filter
+            if self.sync_lock.acquire(blocking=False):
+                try:
+                    self._sync()
+                finally:
+                    self.sync_lock.release()
+
+    def _remember(self, jti, revoked):
+        self.confirmed[jti] = revoked
+        self.confirmed.move_to_end(jti)
+        while len(self.confirmed) > self.cache_size:
+            self.confirmed.popitem(last=False)
+
+    def is_revoked(self, jti):
+        self._refresh()
+        if jti not in self.bloom:
+            return False
+        with self.lock:
+            revoked = self.confirmed.get(jti)
+            if revoked is not None:
+                self.confirmed.move_to_end(jti)
+                return revoked
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        with self.lock:
+            self._remember(jti, revoked)
+        return revoked
+
+    def revoke(self, token):
+        """Revoke a token; returns False if it was already revoked"""
+        self._refresh()
+        jti = token[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    token_type=token[api_settings.TOKEN_TYPE_CLAIM],
+                    expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+                )
+            revoked = True
+        except IntegrityError:
+            revoked = False
+        with self.lock:
+            if jti not in self.bloom:
+                self.bloom.add(jti)
+            self._remember(jti, True)
+        return revoked
+
+
+revoked_tokens = RevocationStore(
+    capacity=settings.TOKEN_REVOCATION_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    cache_size=settings.TOKEN_REVOCATION_CACHE_SIZE,
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_INTERVAL,
+)
+
+
+def is_revoked(token):
+    return revoked_tokens.is_revoked(token[api_settings.JTI_CLAIM])
+
+
+def revoke_token(token):
+    """Revoke a token for the rest of its lifetime; returns False if it already was"""
+    return revoked_tokens.revoke(token)
+
+
+def prune_revoked_tokens(now=None, batch_size=10000):
+    """Delete revocations of tokens that have expired anyway; returns the count"""
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            RevokedToken.objects.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
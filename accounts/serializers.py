@@ -1,9 +1,21 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from core.fieldsets import SparseFieldsetMixin
+from core.hashing import get_hashing_executor
+from .authentication import tokens_for_user
+from .backends import normalize_email
 from .models import UserProfile
+from .revocation import is_revoked, revoke_token
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
@@ -27,7 +39,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         if not '@' in value:
             raise serializers.ValidationError("Enter a valid email address.")
         
-        if User.objects.filter(email=value).exists():
+        # Matched like EmailBackend, so a login never finds two users
+        if User.objects.alias(email_lower=Lower('email')).filter(email_lower=value).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         
         return value
@@ -52,18 +65,26 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Extract academic_year from validated_data
         academic_year = validated_data.pop('academic_year')
         
-        # Create user with email as username
-        user = User.objects.create_user(
-            username=validated_data['email'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name']
-        )
-        
-        # Update profile with academic year
-        user.profile.academic_year = academic_year
-        user.profile.save()
+        # Hash before the transaction, in the hashing pool, so the database
+        # write lock is not held for it
+        password = get_hashing_executor().make_password(validated_data['password'])
+        
+        # User, profile and the queued welcome email are stored together
+        with transaction.atomic():
+            # Create user with email as username
+            email = User.objects.normalize_email(validated_data['email'])
+            user = User(
+                username=User.normalize_username(email),
+                email=email,
+                password=password,
+                first_name=validated_data['first_name'],
+                last_name=validated_data['last_name']
+            )
+            # Attached before the user is saved, so create_user_profile
+            # leaves the profile to us and it is inserted once
+            user.profile = UserProfile(academic_year=academic_year)
+            user.save()
+            user.profile.save()
         
         return user
 
@@ -74,31 +95,68 @@ class UserLoginSerializer(serializers.Serializer):
     
     def validate(self, data):
         """Validate user credentials"""
-        email = data.get('email', '').lower().strip()
+        email = normalize_email(data.get('email'))
         password = data.get('password', '')
         
         if not email or not password:
             raise serializers.ValidationError("Both email and password are required.")
         
-        # Find user by email
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid email or password.")
-        
-        # Check if user is active
-        if not user.is_active:
-            raise serializers.ValidationError("This account is inactive.")
-        
-        # Authenticate user
-        user = authenticate(username=user.username, password=password)
+        # One lookup and one password check through EmailBackend; unknown
+        # emails, wrong passwords and inactive accounts fail alike
+        user = authenticate(self.context.get('request'), email=email, password=password)
         if not user:
             raise serializers.ValidationError("Invalid email or password.")
         
         data['user'] = user
         return data
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Refresh serializer that makes refresh tokens single-use.
+    
+    The new tokens carry the user's current claims, and the presented
+    refresh token is revoked on rotation. Of two refreshes racing with
+    one token only the first succeeds, so a stolen token that has been
+    used already is worthless.
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken("Token has been revoked.")
+        
+        user = User.objects.select_related('profile').filter(
+            pk=refresh.get(jwt_settings.USER_ID_CLAIM)
+        ).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        
+        tokens = tokens_for_user(user)
+        data = {'access': str(tokens.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if not revoke_token(refresh):
+                raise InvalidToken("Token has been revoked.")
+            data['refresh'] = str(tokens)
+        return data
+
+class LogoutSerializer(serializers.Serializer):
+    """Optional refresh token to revoke along with the access token"""
+    refresh = serializers.CharField(required=False)
+    
+    def validate_refresh(self, value):
+        try:
+            refresh = RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError("Invalid refresh token.")
+        
+        user_id = refresh.get(jwt_settings.USER_ID_CLAIM)
+        if str(user_id) != str(self.context['request'].user.pk):
+            raise serializers.ValidationError("Invalid refresh token.")
+        return refresh
+
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for user profile"""
     email = serializers.EmailField(source='user.email', read_only=True)
     first_name = serializers.CharField(source='user.first_name', required=False)
@@ -127,7 +185,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
             user.first_name = user_data['first_name']
         if 'last_name' in user_data:
             user.last_name = user_data['last_name']
-        user.save()
+        # Only the names, so the user's token claims stay trusted
+        user_fields = [field for field in ('first_name', 'last_name') if field in user_data]
+        if user_fields:
+            user.save(update_fields=user_fields)
         
         # Update profile fields
         for attr, value in validated_data.items():
@@ -172,7 +233,7 @@ class TutorApplicationSerializer(serializers.Serializer):
         
         return profile
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Basic user serializer for admin use"""
     profile = UserProfileSerializer(read_only=True)
     
@@ -1,19 +1,17 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
+from .authentication import invalidate_claims
 from .models import UserProfile
+from .outbox import enqueue_email, enqueue_emails, welcome_email
 
 @receiver(post_save, sender=User)
 def send_welcome_email(sender, instance, created, **kwargs):
-    """Send welcome email when user is created"""
+    """Queue the welcome email when a user is created"""
     if created:
-        # In development, just print to console
-        print(f"\n=== WELCOME EMAIL ===\n"
-              f"To: {instance.email}\n"
-              f"Subject: Welcome to Campus Connect!\n"
-              f"Body: Hello {instance.first_name}, welcome to Campus Connect!\n"
-              f"Your account has been created successfully.\n")
+        enqueue_emails([welcome_email(instance)])
 
 @receiver(pre_save, sender=UserProfile)
 def update_profile_timestamp(sender, instance, **kwargs):
@@ -23,13 +21,40 @@ def update_profile_timestamp(sender, instance, **kwargs):
 
 @receiver(post_save, sender=UserProfile)
 def send_tutor_approval_email(sender, instance, created, **kwargs):
-    """Send email when tutor is approved"""
-    if not created and instance.tutor_approved:
-        user = instance.user
-        # In development, print to console
-        print(f"\n=== TUTOR APPROVAL EMAIL ===\n"
-              f"To: {user.email}\n"
-              f"Subject: Your Tutor Application Has Been Approved!\n"
-              f"Body: Congratulations {user.first_name}!\n"
-              f"Your tutor application has been approved.\n"
-              f"You can now receive booking requests from students.\n")
\ No newline at end of file
+    """Queue the approval email when a tutor application is approved"""
+    # Only on the save that approves the tutor, not on every later save
+    if created or not instance.tutor_approved or not instance.has_changed('tutor_approved'):
+        return
+    
+    user = instance.user
+    application_date = instance.tutor_application_date
+    enqueue_email(
+        # One email per application, should a tutor re-apply after rejection
+        f"tutor-approved:{user.pk}:{application_date.isoformat() if application_date else ''}",
+        user.email,
+        "Your Tutor Application Has Been Approved!",
+        f"Congratulations {user.first_name}!\n"
+        f"Your tutor application has been approved.\n"
+        f"You can now receive booking requests from students.\n"
+    )
+
+@receiver(post_save, sender=User)
+def invalidate_user_claims(sender, instance, created, update_fields=None, **kwargs):
+    """Stop trusting token claims once staff or active status may have changed"""
+    if created:
+        return
+    if update_fields is None or {'is_staff', 'is_active'} & set(update_fields):
+        # After commit, so no token is issued with the new version and old claims
+        transaction.on_commit(lambda: invalidate_claims(instance.pk))
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_claims(sender, instance, **kwargs):
+    """Tokens of a deleted user must fall back to the (failing) user lookup"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_claims(user_id))
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_tutor_claims(sender, instance, created, **kwargs):
+    """Stop trusting token claims when a tutor is approved or revoked"""
+    if not created and instance.has_changed('tutor_approved'):
+        transaction.on_commit(lambda: invalidate_claims(instance.user_id))
@@ -1,3 +1,532 @@
-from django.test import TestCase
+import asyncio
+import os
+import signal
+import tempfile
+from io import StringIO
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.hashing import HashingExecutor, HashingOverloaded
+
+from .authentication import get_claims_version, tokens_for_user
+from .models import EmailOutbox, RevokedToken, UserProfile
+from .outbox import enqueue_email, process_outbox
+from .revocation import BloomFilter, RevocationStore, prune_revoked_tokens
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = 1
+
+
+def make_user(email, password=None, tutor=False, staff=False, **fields):
+    user = User.objects.create_user(
+        username=email, email=email, password=password, is_staff=staff, **fields
+    )
+    if tutor:
+        user.profile.is_tutor = True
+        user.profile.tutor_approved = True
+        user.profile.save()
+    return user
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class InlineHashingTestCase(TestCase):
+    """Hashes passwords inline, with a fast hasher, instead of in worker processes"""
+    client_class = APIClient
+
+    def setUp(self):
+        patcher = mock.patch('core.hashing._executor', HashingExecutor(0, 1, 0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class LoginTests(InlineHashingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('Ada.Lovelace@Example.com', password='analytical-engine')
+
+    def login(self, email, password='analytical-engine'):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+
+    def test_email_is_matched_case_insensitively(self):
+        for email in ('ada.lovelace@example.com', 'ADA.LOVELACE@EXAMPLE.COM', 'Ada.Lovelace@Example.com'):
+            with self.subTest(email=email):
+                response = self.login(email)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('access', response.data['tokens'])
+
+    def test_looks_the_user_up_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = authenticate(None, email=' ADA.lovelace@example.com ', password='analytical-engine')
+        self.assertEqual(user, self.user)
+
+    def test_failures_are_indistinguishable(self):
+        self.assertEqual(self.login('ada.lovelace@example.com', 'wrong-password').status_code, 401)
+        self.assertEqual(self.login('nobody@example.com').status_code, 401)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.login('ada.lovelace@example.com')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['errors']['non_field_errors'], ['Invalid email or password.'])
+
+    def test_unknown_emails_still_hash_a_password(self):
+        with mock.patch.object(HashingExecutor, 'make_password', autospec=True) as make_password:
+            self.assertEqual(self.login('nobody@example.com').status_code, 401)
+        make_password.assert_called_once()
+
+    def test_registration_rejects_an_email_differing_only_in_case(self):
+        response = self.client.post('/api/auth/register/', {
+            'email': 'ada.lovelace@example.com',
+            'password': 'difference-engine',
+            'password2': 'difference-engine',
+            'academic_year': 'Year 1',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data['errors'])
+
+    @override_settings(PASSWORD_HASHERS=[
+        'accounts.tests.FastPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_outdated_hashes_are_upgraded_on_login(self):
+        self.assertEqual(self.login('ada.lovelace@example.com').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1$'))
+
+
+class FakePool:
+    """Process pool stand-in running calls inline, or failing them as a pool with a dead worker"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, function, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool())
+        else:
+            future.set_result(function(*args))
+        return future
+
+    def map(self, function, *iterables, chunksize=1):
+        if self.broken:
+            raise BrokenProcessPool()
+        return map(function, *iterables)
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HashingExecutorTests(TestCase):
+    client_class = APIClient
+
+    def executor(self, *pools, max_pending=2):
+        with mock.patch.object(HashingExecutor, '_start_pool', side_effect=pools):
+            executor = HashingExecutor(1, max_pending=max_pending, admission_timeout=0)
+        # Pools started by restarts come from the rest of `pools`
+        patcher = mock.patch.object(HashingExecutor, '_start_pool', side_effect=pools[1:])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return executor
+
+    def test_a_dead_worker_is_replaced_and_the_hash_retried(self):
+        broken, fresh = FakePool(broken=True), FakePool()
+        executor = self.executor(broken, fresh)
+        encoded = executor.make_password('secret-password')
+        self.assertTrue(encoded.startswith('md5$'))
+        self.assertEqual(executor.check_password('secret-password', encoded), (True, False))
+        self.assertIs(executor.pool, fresh)
+        self.assertTrue(broken.shut_down)
+        self.assertEqual(executor.stats()['pending'], 0)
+
+    def test_async_and_batch_hashing_retry_too(self):
+        executor = self.executor(FakePool(broken=True), FakePool(), FakePool())
+        self.assertTrue(asyncio.run(executor.amake_password('secret-password')).startswith('md5$'))
+        executor.pool.broken = True
+        self.assertEqual(len(executor.make_passwords(['a', 'b'])), 2)
+
+    def test_gives_up_when_the_new_pool_breaks_too(self):
+        executor = self.executor(FakePool(broken=True), FakePool(broken=True), FakePool())
+        with self.assertRaises(BrokenProcessPool):
+            executor.make_password('secret-password')
+        self.assertEqual(executor.stats()['pending'], 0)
+
+    def test_rejects_callers_beyond_max_pending(self):
+        executor = self.executor(FakePool(), max_pending=1)
+        executor.slots.acquire()
+        with self.assertRaises(HashingOverloaded):
+            executor.make_password('secret-password')
+        self.assertEqual(executor.stats()['rejected'], 1)
+
+    def test_recovers_from_a_killed_worker_process(self):
+        executor = HashingExecutor(1, max_pending=2, admission_timeout=5)
+        self.addCleanup(lambda: executor.pool.shutdown(wait=True))
+        executor.warm_up()
+        for pid in list(executor.pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        self.assertTrue(executor.make_password('secret-password').startswith('md5$'))
+
+    def test_stats_are_staff_only(self):
+        self.client.force_authenticate(make_user('student@example.com'))
+        self.assertEqual(self.client.get('/api/auth/admin/hashing-stats/').status_code, 403)
+        self.client.force_authenticate(make_user('admin@example.com', staff=True))
+        response = self.client.get('/api/auth/admin/hashing-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('avg_hash_ms', response.data)
+
+
+class TokenClaimsTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.admin = make_user('admin@example.com', staff=True)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(user).access_token}')
+
+    def get_stats(self):
+        return self.client.get('/api/auth/admin/hashing-stats/').status_code
+
+    @override_settings(JWT_TRUST_TOKEN_CLAIMS=True)
+    def test_current_claims_are_trusted_without_loading_the_user(self):
+        self.authenticate(self.admin)
+        self.assertEqual(self.get_stats(), 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_stats(), 200)
+
+    @override_settings(JWT_TRUST_TOKEN_CLAIMS=True)
+    def test_changing_staff_status_invalidates_the_claims(self):
+        self.authenticate(self.admin)
+        self.assertEqual(self.get_stats(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.is_staff = False
+            self.admin.save()
+        self.assertEqual(self.get_stats(), 403)
+
+    @override_settings(JWT_TRUST_TOKEN_CLAIMS=True)
+    def test_approving_a_tutor_invalidates_the_claims(self):
+        user = make_user('tutor@example.com')
+        version = get_claims_version(user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile.is_tutor = True
+            user.profile.save()
+        self.assertEqual(get_claims_version(user.pk), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile.tutor_approved = True
+            user.profile.save()
+        self.assertNotEqual(get_claims_version(user.pk), version)
+
+    def test_profile_updates_keep_the_claims(self):
+        version = get_claims_version(self.admin.pk)
+        self.authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/auth/profile/', {'first_name': 'Grace'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(pk=self.admin.pk).first_name, 'Grace')
+        self.assertEqual(get_claims_version(self.admin.pk), version)
+
+    @override_settings(JWT_TRUST_TOKEN_CLAIMS=False)
+    def test_untrusted_claims_are_checked_against_the_user(self):
+        self.authenticate(self.admin)
+        self.assertEqual(self.get_stats(), 200)
+        # No signal, so the claims version is unchanged
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.assertEqual(self.get_stats(), 403)
+
+
+class RevocationTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.user = make_user('student@example.com')
+        self.tokens = tokens_for_user(self.user)
+
+    def store(self):
+        return RevocationStore(capacity=100, error_rate=0.01, cache_size=10, sync_interval=0)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_unrevoked_tokens_are_cleared_in_memory(self):
+        store = self.store()
+        self.assertFalse(store.is_revoked('never-revoked'))
+        store.sync_interval = 60
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked(self.tokens['jti']))
+
+    def test_revocations_reach_other_processes_on_sync(self):
+        store, other = self.store(), self.store()
+        self.assertFalse(other.is_revoked(self.tokens['jti']))
+        self.assertTrue(store.revoke(self.tokens))
+        self.assertFalse(store.revoke(self.tokens))
+        self.assertTrue(store.is_revoked(self.tokens['jti']))
+        self.assertTrue(other.is_revoked(self.tokens['jti']))
+
+    def test_refresh_tokens_are_single_use(self):
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.tokens)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.data)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.tokens)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_the_access_and_refresh_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens.access_token}')
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+        response = self.client.post('/api/auth/logout/', {'refresh': str(self.tokens)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+        self.client.credentials()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.tokens)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_prune_deletes_only_expired_revocations(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create([
+            RevokedToken(
+                jti=f'expired-{i}', token_type='access', expires_at=now - timezone.timedelta(minutes=i + 1)
+            )
+            for i in range(5)
+        ] + [RevokedToken(jti='live', token_type='refresh', expires_at=now + timezone.timedelta(hours=1))])
+        self.assertEqual(prune_revoked_tokens(now=now, batch_size=2), 5)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class RegistrationTests(InlineHashingTestCase):
+
+    def register(self, **data):
+        return self.client.post('/api/auth/register/', {
+            'email': ' Grace.Hopper@Example.com',
+            'password': 'compiler-1952',
+            'password2': 'compiler-1952',
+            'first_name': 'Grace',
+            'last_name': 'Hopper',
+            'academic_year': 'Year 3',
+            **data
+        }, format='json')
+
+    def test_writes_the_user_profile_and_welcome_email_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+        self.assertEqual(response.status_code, 201)
+        writes = sorted(
+            query['sql'].split(' (')[0].split()[-1] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE'))
+        )
+        self.assertEqual(writes, ['"accounts_emailoutbox"', '"accounts_userprofile"', '"auth_user"'])
+
+        user = User.objects.select_related('profile').get(email='grace.hopper@example.com')
+        self.assertEqual((user.username, user.profile.academic_year), ('grace.hopper@example.com', 'Year 3'))
+        self.assertTrue(user.check_password('compiler-1952'))
+        self.assertEqual(EmailOutbox.objects.get().recipient, 'grace.hopper@example.com')
+
+    def test_other_users_still_get_a_default_profile(self):
+        user = User.objects.create_user(username='admin', email='admin@example.com')
+        self.assertEqual(UserProfile.objects.get(user=user).academic_year, 'Year 1')
+
+    def test_rejects_mismatched_passwords(self):
+        response = self.register(password2='something-else')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportStudentsTests(TestCase):
+
+    def run_import(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('email,first_name,last_name,academic_year,password\n')
+            csv_file.write(''.join(f'{row}\n' for row in rows))
+        self.addCleanup(os.remove, csv_file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_students', csv_file.name, '--workers=0', *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_users_profiles_and_welcome_emails(self):
+        self.run_import([
+            'Ada@Example.com,Ada,Lovelace,Year 2,analytical-engine',
+            'alan@example.com,Alan,Turing,Postgrad,',
+        ], '--batch-size=1')
+        ada = User.objects.select_related('profile').get(email='ada@example.com')
+        self.assertEqual(
+            (ada.username, ada.first_name, ada.profile.academic_year), ('ada@example.com', 'Ada', 'Year 2')
+        )
+        self.assertTrue(ada.check_password('analytical-engine'))
+        self.assertFalse(User.objects.get(email='alan@example.com').has_usable_password())
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list('recipient', flat=True)), ['ada@example.com', 'alan@example.com']
+        )
+
+    def test_skips_invalid_duplicate_and_registered_rows(self):
+        make_user('Existing@Example.com')
+        stdout, stderr = self.run_import([
+            'not-an-email,A,B,Year 1,',
+            'valid@example.com,A,B,Year 9,',
+            'existing@example.com,A,B,Year 1,',
+            'new@example.com,A,B,Year 1,',
+            'NEW@example.com,A,B,Year 1,',
+        ])
+        self.assertIn("Line 2: invalid email 'not-an-email'", stderr)
+        self.assertIn("Line 3: invalid academic year 'Year 9'", stderr)
+        self.assertIn('Line 6: duplicate email new@example.com', stderr)
+        self.assertIn('1 students to import, 1 already registered', stdout)
+        self.assertEqual(User.objects.filter(email='new@example.com').count(), 1)
+
+    def test_skips_usernames_held_by_other_accounts(self):
+        # Registered as taken@example.com, then changed email
+        User.objects.create_user(username='taken@example.com', email='changed@example.com')
+        stdout, stderr = self.run_import([
+            'taken@example.com,A,B,Year 1,',
+            'free@example.com,A,B,Year 1,',
+        ])
+        self.assertIn('taken@example.com: username already taken by another account', stderr)
+        self.assertIn('1 students to import, 0 already registered, 1 usernames taken', stdout)
+        self.assertEqual(User.objects.get(username='taken@example.com').email, 'changed@example.com')
+        self.assertTrue(User.objects.filter(email='free@example.com').exists())
+
+    def test_dry_run_imports_nothing(self):
+        stdout, _ = self.run_import(['ada@example.com,Ada,Lovelace,Year 2,'], '--dry-run')
+        self.assertIn('1 students to import', stdout)
+        self.assertFalse(User.objects.exists())
+
+
+class UserListPaginationTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.admin = make_user('admin@example.com', staff=True)
+        self.users = [make_user(f'user{i}@example.com') for i in range(4)]
+        self.client.force_authenticate(self.admin)
+
+    def test_pages_follow_date_joined_then_id_descending(self):
+        User.objects.filter(pk__in=[user.pk for user in self.users]).update(
+            date_joined=self.admin.date_joined
+        )
+        ids = []
+        url = '/api/auth/admin/users/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids += [user['id'] for user in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, sorted([self.admin.pk] + [user.pk for user in self.users], reverse=True))
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(
+            '/api/auth/admin/users/', {'fields': 'id,email,profile.academic_year', 'page_size': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'id': self.users[-1].pk, 'email': 'user3@example.com', 'profile': {'academic_year': 'Year 1'}}
+        ])
+        self.assertIsNotNone(response.data['next'])
+
+
+class EmailOutboxTests(TestCase):
+
+    def make_due(self):
+        EmailOutbox.objects.update(available_at=timezone.now())
+
+    def test_enqueue_skips_duplicate_keys(self):
+        enqueue_email('reminder:1', 'a@example.com', 'Reminder', 'First')
+        enqueue_email('reminder:1', 'a@example.com', 'Reminder', 'Second')
+        self.assertEqual(list(EmailOutbox.objects.values_list('body', flat=True)), ['First'])
+
+    def test_tutor_approval_sends_one_email(self):
+        approvals = EmailOutbox.objects.filter(dedup_key__startswith='tutor-approved:')
+        user = make_user('tutor@example.com')
+        profile = user.profile
+        profile.apply_as_tutor()
+        profile.save()
+        self.assertFalse(approvals.exists())
+
+        profile.tutor_approved = True
+        profile.save()
+        self.assertEqual(list(approvals.values_list('recipient', flat=True)), ['tutor@example.com'])
+
+        # Later saves of the approved tutor send nothing more
+        profile.academic_year = 'Year 2'
+        profile.save()
+        UserProfile.objects.get(pk=profile.pk).save()
+        user.first_name = 'Ada'
+        user.save()
+        self.assertEqual(approvals.count(), 1)
+
+    def test_messages_commit_with_the_change(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            make_user('gone@example.com')
+            raise ValueError
+        self.assertFalse(EmailOutbox.objects.exists())
+
+        user = make_user('new@example.com')
+        self.assertEqual(
+            list(EmailOutbox.objects.values_list('dedup_key', 'recipient')),
+            [(f'welcome:{user.pk}', 'new@example.com')]
+        )
+
+    def test_sent_messages_are_not_sent_again(self):
+        enqueue_email('reminder:1', 'a@example.com', 'Reminder', 'Body')
+        self.assertEqual(process_outbox(), (1, 0))
+        self.assertEqual(process_outbox(), (0, 0))
+        self.assertEqual([email.to for email in mail.outbox], [['a@example.com']])
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        enqueue_email('reminder:1', 'a@example.com', 'Reminder', 'Body')
+        enqueue_email('reminder:2', 'b@example.com', 'Reminder', 'Body')
+        send = EmailMessage.send
+
+        def fail_for_b(email, *args, **kwargs):
+            if email.to == ['b@example.com']:
+                raise OSError('Mailbox unavailable')
+            return send(email, *args, **kwargs)
+
+        with mock.patch.object(EmailMessage, 'send', fail_for_b):
+            self.assertEqual(process_outbox(max_attempts=2), (1, 1))
+            failed = EmailOutbox.objects.get(dedup_key='reminder:2')
+            self.assertEqual(
+                (failed.status, failed.attempts, failed.last_error),
+                ('pending', 1, 'Mailbox unavailable')
+            )
+            self.assertGreater(failed.available_at, timezone.now())
+            # Not due again until the backoff has passed
+            self.assertEqual(process_outbox(max_attempts=2), (0, 0))
+
+            self.make_due()
+            self.assertEqual(process_outbox(max_attempts=2), (0, 1))
+            self.assertEqual(EmailOutbox.objects.get(dedup_key='reminder:2').status, 'failed')
+
+            self.make_due()
+            self.assertEqual(process_outbox(max_attempts=2), (0, 0))
+
+    def test_retry_succeeds_once_the_server_recovers(self):
+        enqueue_email('reminder:1', 'a@example.com', 'Reminder', 'Body')
+        with mock.patch.object(EmailMessage, 'send', side_effect=OSError('Connection refused')):
+            self.assertEqual(process_outbox(), (0, 1))
+        self.make_due()
+        self.assertEqual(process_outbox(), (1, 0))
+        self.assertEqual(EmailOutbox.objects.get().attempts, 2)
@@ -10,6 +10,7 @@ from .views import (
     # Admin views kept simple
     TutorApplicationsView,
     UserListView,
+    HashingStatsView,
 )
 
 app_name = 'accounts'
@@ -29,4 +30,5 @@ urlpatterns = [
     # Admin endpoints (minimal)
     path('admin/users/', UserListView.as_view(), name='user_list'),
     path('admin/tutor-applications/', TutorApplicationsView.as_view(), name='tutor_applications'),
+    path('admin/hashing-stats/', HashingStatsView.as_view(), name='hashing_stats'),
 ]
\ No newline at end of file
@@ -2,18 +2,25 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
 
+from core.fieldsets import Fieldset
+from core.hashing import get_hashing_executor
+from core.pagination import KeysetPagination
+
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer,
     UserProfileSerializer,
     TutorApplicationSerializer,
-    UserSerializer
+    UserSerializer,
+    LogoutSerializer
 )
+from .authentication import tokens_for_user
 from .permissions import IsOwnerOrReadOnly
+from .revocation import revoke_token
 
 class RegisterView(APIView):
     """View for user registration"""
@@ -31,7 +38,7 @@ class RegisterView(APIView):
         user = serializer.save()
         
         # Generate tokens for immediate login
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
         return Response({
             "message": "Registration successful",
@@ -46,7 +53,7 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
-        serializer = UserLoginSerializer(data=request.data)
+        serializer = UserLoginSerializer(data=request.data, context={'request': request})
         
         if not serializer.is_valid():
             return Response(
@@ -57,7 +64,7 @@ class LoginView(APIView):
         user = serializer.validated_data['user']
         
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
         return Response({
             "message": "Login successful",
@@ -127,6 +134,20 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
+        """Revoke the access token, and the refresh token if one is given"""
+        serializer = LogoutSerializer(data=request.data, context={'request': request})
+        
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if request.auth is not None:
+            revoke_token(request.auth)
+        if 'refresh' in serializer.validated_data:
+            revoke_token(serializer.validated_data['refresh'])
+        
         return Response({
             "message": "Logged out successfully"
         }, status=status.HTTP_200_OK)
@@ -155,10 +176,20 @@ class TutorApplicationsView(APIView):
             tutor_approved=False
         ).select_related('user')
         
-        serializer = UserProfileSerializer(pending_applications, many=True)
+        paginator = KeysetPagination(ordering=('-date_joined', '-id'))
+        fieldset = Fieldset.from_request(request)
+        if fieldset is not None:
+            pending_applications = UserProfileSerializer(
+                fieldset=fieldset
+            ).narrow_queryset(pending_applications, extra=paginator.ordering)
+        
+        page = paginator.paginate_queryset(pending_applications, request, view=self)
+        serializer = UserProfileSerializer(page, many=True, fieldset=fieldset)
         
         return Response({
-            "applications": serializer.data
+            "applications": serializer.data,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
         }, status=status.HTTP_200_OK)
     
     def post(self, request, user_id=None):
@@ -178,7 +209,9 @@ class TutorApplicationsView(APIView):
         
         if action == 'approve':
             profile.tutor_approved = True
-            profile.save()
+            # The approval and its queued email commit together
+            with transaction.atomic():
+                profile.save()
             message = "Tutor application approved."
         else:
             profile.is_tutor = False
@@ -198,5 +231,21 @@ class UserListView(APIView):
     def get(self, request):
         """Get all users"""
         users = User.objects.all().select_related('profile')
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        paginator = KeysetPagination(ordering=('-date_joined', '-id'))
+        
+        fieldset = Fieldset.from_request(request)
+        if fieldset is not None:
+            users = UserSerializer(fieldset=fieldset).narrow_queryset(
+                users, extra=paginator.ordering
+            )
+        
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = UserSerializer(page, many=True, fieldset=fieldset)
+        return paginator.get_paginated_response(serializer.data)
+
+class HashingStatsView(APIView):
+    """Password hashing pool load and latency (admin only)"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(get_hashing_executor().stats(), status=status.HTTP_200_OK)
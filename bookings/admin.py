@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Subject, Booking
+from .models import Subject, Booking, TutorSubject, TutorStats, ArchivedBooking, WaitlistEntry
+from .search import matching
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -10,5 +11,44 @@ class SubjectAdmin(admin.ModelAdmin):
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('id', 'student', 'tutor', 'subject', 'start_time', 'status')
     list_filter = ('status', 'subject', 'start_time')
+    search_fields = ('student__email', 'tutor__email')
+    readonly_fields = ('created_at', 'updated_at')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match emails as usual, plus full-text matches on the booking's text"""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= matching(queryset, search_term)
+        return results, may_have_duplicates
+
+@admin.register(TutorSubject)
+class TutorSubjectAdmin(admin.ModelAdmin):
+    list_display = ('tutor', 'subject', 'created_at')
+    list_filter = ('subject',)
+    search_fields = ('tutor__email', 'subject__name', 'subject__code')
+    raw_id_fields = ('tutor',)
+
+@admin.register(TutorStats)
+class TutorStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'tutor', 'average_rating', 'rating_count', 'completed_count',
+        'cancelled_count', 'no_show_count', 'hours_taught', 'earnings'
+    )
+    search_fields = ('tutor__email',)
+    readonly_fields = [field.name for field in TutorStats._meta.fields]
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'student', 'tutor', 'subject', 'start_time', 'status', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('student__email', 'tutor__email', 'topic')
+    raw_id_fields = ('student', 'tutor', 'cancelled_by')
+    readonly_fields = [field.name for field in ArchivedBooking._meta.fields]
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'student', 'tutor', 'start_time', 'status', 'created_at', 'promoted_at')
+    list_filter = ('status',)
     search_fields = ('student__email', 'tutor__email', 'topic')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    raw_id_fields = ('student', 'tutor', 'booking')
+    readonly_fields = ('created_at', 'updated_at', 'promoted_at')
@@ -0,0 +1,48 @@
+import time
+
+from django.db import transaction
+
+from .models import ArchivedBooking, Booking, BookingTombstone
+
+# Bookings that can no longer change and so may be archived
+FINISHED_STATUSES = ('completed', 'cancelled', 'no_show', 'expired')
+
+
+def archive_bookings(cutoff, chunk_size=1000, pause=0):
+    """
+    Move finished bookings that ended before cutoff into ArchivedBooking.
+
+    Each chunk is copied and deleted in its own short transaction, selected
+    through the (status, start_time) index, so the hot table is never
+    locked for the whole run. A tombstone per booking tells changes feed
+    clients it is gone. Returns the number of bookings archived.
+    """
+    queryset = Booking.objects.filter(
+        status__in=FINISHED_STATUSES,
+        start_time__lt=cutoff,
+        end_time__lt=cutoff,
+    ).values(*ArchivedBooking.ARCHIVED_FIELDS)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset[:chunk_size])
+            if not rows:
+                return archived
+            ArchivedBooking.objects.bulk_create([ArchivedBooking(**row) for row in rows])
+            BookingTombstone.objects.bulk_create([
+                BookingTombstone(
+                    booking_id=row['id'],
+                    student_id=row['student_id'],
+                    tutor_id=row['tutor_id'],
+                    reason='archived'
+                )
+                for row in rows
+            ])
+            Booking.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+        archived += len(rows)
+        if len(rows) < chunk_size:
+            return archived
+        if pause:
+            time.sleep(pause)
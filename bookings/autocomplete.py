@@ -0,0 +1,86 @@
+import re
+import threading
+from bisect import bisect_left
+
+from . import cache
+from .models import Subject
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(TOKEN_RE.findall(text.casefold()))
+
+
+class SubjectIndex:
+    """
+    Sorted in-memory prefix index over subject names and codes.
+
+    Each kind of key (whole name, code, word inside the name) is kept in
+    its own sorted list of (key, subject id), so the subjects starting
+    with a prefix are a contiguous run found by bisection. A lookup walks
+    the runs in rank order and stops once it has `limit` subjects, which
+    makes it O(log n + limit) however many subjects match.
+    """
+
+    # Name prefixes rank first, then code prefixes, then words in the name
+    KINDS = ('name', 'code', 'word')
+
+    def __init__(self, subjects):
+        self.subjects = {}
+        keys = {kind: [] for kind in self.KINDS}
+        for subject in subjects:
+            self.subjects[subject['id']] = subject
+            name = normalize(subject['name'])
+            keys['name'].append((name, subject['id']))
+            if subject['code']:
+                keys['code'].append((normalize(subject['code']), subject['id']))
+            # The first word is already covered by the whole name
+            for word in set(name.split()[1:]):
+                keys['word'].append((word, subject['id']))
+        self.keys = [sorted(keys[kind]) for kind in self.KINDS]
+
+    @classmethod
+    def build(cls):
+        return cls(Subject.objects.order_by().values('id', 'name', 'code'))
+
+    def search(self, text, limit, words=True):
+        """Return up to `limit` subjects whose name, code or a name word starts with text"""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        found = {}
+        for keys in self.keys if words else self.keys[:2]:
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and len(found) < limit:
+                key, subject_id = keys[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(subject_id, self.subjects[subject_id])
+                position += 1
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+
+_index = None
+_index_version = None
+_build_lock = threading.Lock()
+
+
+def get_subject_index():
+    """
+    Return the subject index, rebuilding it when subjects have changed.
+
+    Freshness is checked against the subject listing's cache version,
+    which the Subject signals bump, so other processes pick up changes
+    too; the database is only read to rebuild.
+    """
+    global _index, _index_version
+    version = cache.get_version(cache.SUBJECTS)
+    if _index_version != version:
+        with _build_lock:
+            if _index_version != version:
+                index = SubjectIndex.build()
+                _index, _index_version = index, version
+    return _index
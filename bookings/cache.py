@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+SUBJECTS = 'subjects'
+TUTORS = 'tutors'
+
+
+def _version_key(namespace):
+    return f'listing-version:{namespace}'
+
+
+def get_version(namespace):
+    """Return the current version of a cached listing"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never comes back to a
+        # version whose payload may still be cached
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every cached payload of a listing"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        get_version(namespace)
+
+
+def get_listing(namespace, build):
+    """
+    Return the serialized payload of a listing, building it on a miss.
+
+    Payloads are stored under the listing's current version, so bumping the
+    version makes every older payload unreachable. Returns (data, hit).
+    """
+    key = f'listing:{namespace}:v{get_version(namespace)}'
+    data = cache.get(key)
+    hit = data is not None
+    if not hit:
+        data = build()
+        cache.set(key, data, timeout=settings.LISTING_CACHE_TIMEOUT)
+    _count(namespace, 'hits' if hit else 'misses')
+    return data, hit
+
+
+def get_stats(namespaces=(SUBJECTS, TUTORS)):
+    """Return hit/miss counters for the cached listings"""
+    stats = {}
+    for namespace in namespaces:
+        hits = cache.get(f'listing-stats:{namespace}:hits', 0)
+        misses = cache.get(f'listing-stats:{namespace}:misses', 0)
+        total = hits + misses
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def _count(namespace, outcome):
+    key = f'listing-stats:{namespace}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
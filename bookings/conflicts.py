@@ -0,0 +1,57 @@
+from bisect import bisect_left, bisect_right
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking
+
+
+def find_conflicts(tutor, intervals, exclude_ids=()):
+    """
+    Find the tutor's active bookings overlapping each (start, end) interval.
+
+    All intervals are checked in a single query. Returns a list with one
+    entry per interval holding the ids of the bookings it overlaps.
+    """
+    intervals = list(intervals)
+    if not intervals:
+        return []
+
+    # A session never runs longer than MAX_DURATION_MINUTES, so an overlapping
+    # booking must also start after (start - max duration). This bounds the
+    # range scan on the (tutor, status, start_time, end_time) index to the
+    # proposed window instead of the tutor's whole history.
+    max_duration = timezone.timedelta(minutes=Booking.MAX_DURATION_MINUTES)
+    window = Q()
+    for start_time, end_time in intervals:
+        window |= Q(
+            start_time__gt=start_time - max_duration,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+
+    queryset = Booking.objects.filter(
+        window,
+        tutor=getattr(tutor, 'pk', tutor),
+        status__in=Booking.ACTIVE_STATUSES,
+    )
+    if exclude_ids:
+        queryset = queryset.exclude(pk__in=exclude_ids)
+
+    rows = sorted(queryset.order_by().values_list('start_time', 'end_time', 'id'))
+    starts = [row[0] for row in rows]
+
+    conflicts = []
+    for start_time, end_time in intervals:
+        lo = bisect_right(starts, start_time - max_duration)
+        hi = bisect_left(starts, end_time)
+        conflicts.append([
+            booking_id for _, booked_end, booking_id in rows[lo:hi]
+            if booked_end > start_time
+        ])
+    return conflicts
+
+
+def is_tutor_available(tutor, start_time, end_time, exclude_ids=()):
+    """Check whether the tutor has no active booking overlapping the interval"""
+    return not find_conflicts(tutor, [(start_time, end_time)], exclude_ids)[0]
@@ -0,0 +1,133 @@
+import csv
+import datetime
+import decimal
+import heapq
+import io
+import json
+from itertools import islice
+from operator import itemgetter
+
+from .models import ArchivedBooking, Booking
+
+# (column name, lookup) pairs of the billing export
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('student_email', 'student__email'),
+    ('student_name', 'student__first_name'),
+    ('student_last_name', 'student__last_name'),
+    ('tutor_email', 'tutor__email'),
+    ('tutor_name', 'tutor__first_name'),
+    ('tutor_last_name', 'tutor__last_name'),
+    ('subject', 'subject__name'),
+    ('subject_code', 'subject__code'),
+    ('topic', 'topic'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('duration_minutes', 'duration_minutes'),
+    ('status', 'status'),
+    ('hourly_rate', 'hourly_rate'),
+    ('total_amount', 'total_amount'),
+    ('is_paid', 'is_paid'),
+    ('created_at', 'created_at'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def get_export_querysets(start=None, end=None, statuses=None):
+    """
+    Bookings to export, filtered on start_time and status.
+
+    Returns the live and the archived bookings; billing covers both, so
+    archiving never drops rows from an export.
+    """
+    querysets = []
+    for model in (Booking, ArchivedBooking):
+        queryset = model.objects.all()
+        if start:
+            queryset = queryset.filter(start_time__gte=start)
+        if end:
+            queryset = queryset.filter(start_time__lt=end)
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        querysets.append(queryset)
+    return querysets
+
+
+def iter_chunks(*querysets, chunk_size=2000):
+    """
+    Yield lists of export rows (tuples) in id order, reading the tables in primary key chunks.
+
+    Each chunk is a separate short query seeking past the last id seen, so
+    memory stays flat and no read transaction is held open between chunks,
+    which on SQLite would block writers for the whole export. Several
+    querysets (bookings and their archive, whose ids never overlap) are
+    merged on id.
+    """
+    rows = heapq.merge(
+        *(_iter_rows(queryset, chunk_size) for queryset in querysets), key=itemgetter(0)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_rows(queryset, chunk_size):
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    queryset = queryset.order_by('id').values_list(*lookups)
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def stream_csv(querysets, chunk_size=2000):
+    """Yield the export as CSV text, one chunk of rows per item"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    yield _drain(buffer)
+
+    for rows in iter_chunks(*querysets, chunk_size=chunk_size):
+        writer.writerows([_format(value) for value in row] for row in rows)
+        yield _drain(buffer)
+
+
+def stream_ndjson(querysets, chunk_size=2000):
+    """Yield the export as newline-delimited JSON, one chunk of rows per item"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for rows in iter_chunks(*querysets, chunk_size=chunk_size):
+        yield ''.join(
+            json.dumps(dict(zip(names, row)), default=_format) + '\n'
+            for row in rows
+        )
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return value
+
+
+def _format(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
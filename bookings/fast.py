@@ -0,0 +1,134 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+from core.fieldsets import Fieldset
+
+CENTS = Decimal('0.01')
+
+
+def _datetime(value, current_tz):
+    # Same as DRF's ISO 8601 DateTimeField output
+    if value is None:
+        return None
+    value = timezone.localtime(value, current_tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _decimal(value, current_tz):
+    # Same as DRF's DecimalField output with coerce_to_string
+    if value is None:
+        return None
+    return f'{value.quantize(CENTS):f}'
+
+
+def _plain(value, current_tz):
+    return value
+
+
+# Output fields of each serializer mirrored here, in their output order:
+# name -> (columns read, formatter). Relations map to the fields of the
+# related object instead.
+USER_FIELDS = {
+    'id': (('id',), _plain),
+    'email': (('email',), _plain),
+    'full_name': (('first_name', 'last_name'), None),
+    'academic_year': (('profile__academic_year',), None),
+}
+SUBJECT_FIELDS = {
+    name: ((name,), _plain) for name in ('id', 'name', 'code', 'description')
+}
+BOOKING_FIELDS = {
+    'id': (('id',), _plain),
+    'student': USER_FIELDS,
+    'tutor': USER_FIELDS,
+    'subject': SUBJECT_FIELDS,
+    'topic': (('topic',), _plain),
+    'description': (('description',), _plain),
+    'duration_minutes': (('duration_minutes',), _plain),
+    'start_time': (('start_time',), _datetime),
+    'end_time': (('end_time',), _datetime),
+    'location': (('location',), _plain),
+    'is_virtual': (('is_virtual',), _plain),
+    'meeting_link': (('meeting_link',), _plain),
+    'status': (('status',), _plain),
+    'hourly_rate': (('hourly_rate',), _decimal),
+    'total_amount': (('total_amount',), _decimal),
+    'is_paid': (('is_paid',), _plain),
+    'student_rating': (('student_rating',), _plain),
+    'student_review': (('student_review',), _plain),
+    'created_at': (('created_at',), _datetime),
+}
+
+
+class FlatBookingSerializer:
+    """
+    Build BookingSerializer's output from flat values() rows.
+
+    The columns of the requested fields, including those of both users with
+    their profile and the subject, are fetched in one query and each row is
+    turned into the same shape and formatting as BookingSerializer, without
+    instantiating any field objects or related instances. Honours the same
+    ?fields= / ?expand= fieldsets as the ModelSerializer path.
+    """
+
+    def __init__(self, fieldset=None):
+        self.current_tz = timezone.get_current_timezone()
+        self.columns = []
+        self.writers = self.compile(BOOKING_FIELDS, fieldset or Fieldset(), '')
+
+    def compile(self, fields, fieldset, prefix):
+        fieldset.validate(
+            fields, [name for name, spec in fields.items() if isinstance(spec, dict)]
+        )
+        writers = []
+        for name, spec in fields.items():
+            if not fieldset.includes(name):
+                continue
+            if isinstance(spec, dict):
+                if fieldset.expands(name):
+                    nested = self.compile(spec, fieldset.nested(name), f'{prefix}{name}__')
+                    writers.append((name, self.nested_writer(f'{prefix}{name}__', nested)))
+                else:
+                    writers.append((name, self.column_writer(f'{prefix}{name}_id', _plain)))
+            elif name == 'full_name':
+                writers.append((name, self.full_name_writer(prefix)))
+            elif name == 'academic_year':
+                # None for a user without a profile, as in SimpleUserSerializer
+                writers.append((name, self.column_writer(f'{prefix}profile__academic_year', _plain)))
+            else:
+                columns, formatter = spec
+                writers.append((name, self.column_writer(f'{prefix}{columns[0]}', formatter)))
+        return writers
+
+    def column_writer(self, column, formatter):
+        self.columns.append(column)
+        current_tz = self.current_tz
+        return lambda row: formatter(row[column], current_tz)
+
+    def full_name_writer(self, prefix):
+        first_name, last_name = f'{prefix}first_name', f'{prefix}last_name'
+        self.columns.extend((first_name, last_name))
+        return lambda row: f'{row[first_name]} {row[last_name]}'.strip()
+
+    def nested_writer(self, prefix, writers):
+        # Tells a missing related row apart from a related row with nulls
+        key = f'{prefix}id'
+        self.columns.append(key)
+
+        def write(row):
+            if row[key] is None:
+                return None
+            return {name: writer(row) for name, writer in writers}
+        return write
+
+    def rows(self, queryset, extra=()):
+        """Narrow a booking queryset to the flat rows read by serialize()"""
+        extra = [column.lstrip('-') for column in extra]
+        return queryset.values(*dict.fromkeys([*self.columns, *extra]))
+
+    def serialize(self, rows):
+        writers = self.writers
+        return [{name: writer(row) for name, writer in writers} for row in rows]
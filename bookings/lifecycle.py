@@ -0,0 +1,69 @@
+import time
+
+from django.utils import timezone
+
+from .models import Booking, WaitlistEntry
+
+# (from status, to status, time field that must have passed)
+TRANSITIONS = (
+    # Never confirmed before the session was due to start
+    ('pending', 'expired', 'start_time'),
+    # Session is over; waiting for the tutor to mark it completed or no-show
+    ('confirmed', 'awaiting_completion', 'end_time'),
+)
+
+
+def sweep_transition(from_status, to_status, field, now, chunk_size=500, pause=0):
+    """
+    Move bookings of from_status whose `field` has passed to to_status.
+
+    Works in chunks: each one selects up to chunk_size ids through the
+    (status, start_time) index and updates them in a single UPDATE, which
+    commits on its own, so no write lock is held for more than one chunk.
+    Sessions end after they start, so bounding start_time as well keeps the
+    end_time sweep on the index. Returns the number of bookings moved.
+    """
+    queryset = Booking.objects.filter(
+        status=from_status,
+        **{'start_time__lte': now, f'{field}__lte': now}
+    )
+    moved = 0
+    while True:
+        ids = list(queryset.order_by('start_time', 'id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return moved
+        # Status guard: a booking updated through the API since it was
+        # selected is left alone. updated_at is set explicitly because
+        # update() bypasses auto_now, and the changes feed relies on it.
+        moved += Booking.objects.filter(id__in=ids, status=from_status).update(
+            status=to_status,
+            updated_at=timezone.now()
+        )
+        if len(ids) < chunk_size:
+            return moved
+        if pause:
+            time.sleep(pause)
+
+
+def expire_waitlist(now):
+    """Expire waitlist entries whose session has started; returns how many"""
+    return WaitlistEntry.objects.filter(status='waiting', start_time__lte=now).update(
+        status='expired',
+        updated_at=timezone.now()
+    )
+
+
+def sweep_bookings(now=None, chunk_size=500, pause=0):
+    """
+    Run every lifecycle transition once.
+
+    Returns a dict mapping each target status to the number of bookings
+    moved into it, plus the number of waitlist entries expired.
+    """
+    now = now or timezone.now()
+    counts = {
+        to_status: sweep_transition(from_status, to_status, field, now, chunk_size, pause)
+        for from_status, to_status, field in TRANSITIONS
+    }
+    counts['waitlist_expired'] = expire_waitlist(now)
+    return counts
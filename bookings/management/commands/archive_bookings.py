@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.archive import archive_bookings
+
+
+class Command(BaseCommand):
+    help = 'Move finished bookings past the archive cutoff into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+            help='Archive bookings that ended more than this many days ago',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of bookings moved per transaction',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks, to leave room for other writers',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(days=options['days'])
+        started = time.monotonic()
+        count = archive_bookings(
+            cutoff,
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {count} bookings that ended before {cutoff:%Y-%m-%d} in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,103 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from bookings.fast import FlatBookingSerializer
+from bookings.models import Booking, Subject
+from bookings.serializers import BookingSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare BookingSerializer with the flat list serializer on one page '
+        'of bookings. Sample data is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Bookings per page')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each path')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        page = self.create_sample(rows)
+
+        def model_path():
+            queryset = Booking.objects.filter(pk__in=page).select_related(
+                'student', 'tutor', 'subject'
+            ).order_by('-created_at', '-id')
+            return BookingSerializer(queryset, many=True).data
+
+        def fast_path():
+            queryset = Booking.objects.filter(pk__in=page).order_by('-created_at', '-id')
+            serializer = FlatBookingSerializer()
+            return serializer.serialize(serializer.rows(queryset))
+
+        if [dict(item) for item in model_path()] != fast_path():
+            raise CommandError('The flat serializer output differs from BookingSerializer')
+
+        model_time, model_queries = self.measure(model_path, repeat)
+        fast_time, fast_queries = self.measure(fast_path, repeat)
+
+        self.stdout.write(
+            f'BookingSerializer: {model_time * 1000:.1f} ms/page, {model_queries} queries'
+        )
+        self.stdout.write(
+            f'Flat serializer:   {fast_time * 1000:.1f} ms/page, {fast_queries} queries'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: {model_time / fast_time:.1f}x on {rows}-row pages'
+        ))
+
+    def create_sample(self, rows):
+        # bulk_create skips the post_save signals, so no emails go out and
+        # the profiles are created explicitly
+        users = User.objects.bulk_create([
+            User(username=f'bench-{role}-{i}', email=f'bench-{role}-{i}@example.com',
+                 first_name='Bench', last_name=f'{role.title()} {i}')
+            for role in ('student', 'tutor') for i in range(20)
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        students, tutors = users[:20], users[20:]
+        subject = Subject.objects.create(name='Benchmark subject', code='BENCH')
+
+        start = timezone.now() + timezone.timedelta(days=1)
+        bookings = []
+        for i in range(rows):
+            booking = Booking(
+                student=students[i % len(students)],
+                tutor=tutors[i % len(tutors)],
+                subject=subject if i % 2 else None,
+                topic=f'Session {i}',
+                description='Benchmark session ' * 10,
+                start_time=start + timezone.timedelta(hours=i),
+                hourly_rate=25,
+                student_review='Helpful session ' * 10,
+            )
+            booking.populate_derived_fields()
+            bookings.append(booking)
+        return [booking.pk for booking in Booking.objects.bulk_create(bookings)]
+
+    def measure(self, path, repeat):
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            path()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            path()
+        return (time.perf_counter() - started) / repeat, len(queries)
@@ -0,0 +1,127 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from bookings.models import Booking
+from bookings.search import fts_available, rebuild_index, search_bookings
+
+WORDS = (
+    'calculus algebra geometry statistics probability physics mechanics optics '
+    'chemistry organic biology genetics ecology history economics accounting '
+    'marketing programming python databases networks algorithms compilers '
+    'literature poetry grammar essay french spanish german philosophy ethics '
+    'psychology sociology anatomy pharmacology thermodynamics electronics'
+).split()
+
+FILLER = 'review session exam homework practice revision notes questions help'.split()
+
+# Sample users; each student ends up with rows / STUDENTS bookings
+STUDENTS = 10000
+TUTORS = 500
+
+QUERIES = ('thermodynamics', 'statistic', 'organic chemistry', 'python algorithms', 'exam')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Time ranked full-text booking searches on a large sample. Sample data '
+        'is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Bookings in the sample')
+        parser.add_argument('--limit', type=int, default=20, help='Results per search')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs of each query')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('The FTS5 index is not available on this database')
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['limit'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, limit, repeat):
+        started = time.perf_counter()
+        student, tutor = self.create_sample(rows)
+        indexed = rebuild_index()
+        self.stdout.write(f'Indexed {indexed} bookings in {time.perf_counter() - started:.1f}s')
+
+        # Searches as BookingViewSet.search runs them for each kind of user
+        scopes = (
+            ('staff', Booking.objects.all(), None),
+            ('student', Booking.objects.filter(Q(student=student) | Q(tutor=student)), student.pk),
+            ('tutor', Booking.objects.filter(Q(student=tutor) | Q(tutor=tutor)), tutor.pk),
+        )
+        worst = 0
+        for text in QUERIES:
+            for label, queryset, user_id in scopes:
+                search_bookings(queryset, text, limit, user_id)
+                began = time.perf_counter()
+                for _ in range(repeat):
+                    found = search_bookings(queryset, text, limit, user_id)
+                elapsed = (time.perf_counter() - began) / repeat
+                worst = max(worst, elapsed)
+                self.stdout.write(
+                    f'{text!r:>22} as {label:<7}: {elapsed * 1000:6.2f} ms, {len(found)} results'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Slowest search: {worst * 1000:.2f} ms over {rows} bookings'
+        ))
+
+    def create_sample(self, rows, distinct=10000):
+        # bulk_create skips the post_save signals, so no emails go out, the
+        # profiles are created explicitly and the index is rebuilt afterwards
+        users = User.objects.bulk_create([
+            User(username=f'bench-search-{i}', email=f'bench-search-{i}@example.com')
+            for i in range(STUDENTS + TUTORS)
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        students, tutors = users[:STUDENTS], users[STUDENTS:]
+
+        rng = random.Random(0)
+        start = timezone.now() + timezone.timedelta(days=1)
+        # Zipf-like: a few subjects are far more common than the rest
+        weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+        bookings = []
+        for i in range(min(rows, distinct)):
+            words = rng.choices(WORDS, weights, k=3)
+            bookings.append(Booking(
+                student=students[i % len(students)],
+                tutor=tutors[i % len(tutors)],
+                topic=' '.join(words[:2]).title(),
+                description=' '.join(words + rng.choices(FILLER, k=8)),
+                student_review=' '.join(rng.choices(FILLER, k=5)),
+                start_time=start + timezone.timedelta(minutes=i),
+                end_time=start + timezone.timedelta(minutes=i + 60),
+            ))
+        template = [booking.pk for booking in Booking.objects.bulk_create(bookings)]
+
+        # Copy the template rows in SQL up to the requested size; building
+        # a million model instances would dominate the run
+        columns = [
+            field.column for field in Booking._meta.concrete_fields if not field.primary_key
+        ]
+        table = Booking._meta.db_table
+        with connection.cursor() as cursor:
+            for copied in range(len(template), rows, len(template)):
+                count = min(len(template), rows - copied)
+                cursor.execute(
+                    f'INSERT INTO {table} ({", ".join(columns)}) '
+                    f'SELECT {", ".join(columns)} FROM {table} '
+                    f'WHERE id BETWEEN %s AND %s',
+                    [template[0], template[count - 1]]
+                )
+        return students[0], tutors[0]
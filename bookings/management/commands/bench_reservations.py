@@ -0,0 +1,111 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure booking throughput with parallel writers, all booking one '
+        'tutor and then one tutor each, and check that no tutor is double '
+        'booked. Writers must commit to see each other, so the sample users '
+        'are created for real and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=50, help='Parallel writer threads')
+        parser.add_argument('--requests', type=int, default=20, help='Bookings requested per writer')
+
+    def handle(self, *args, **options):
+        writers, requests = options['writers'], options['requests']
+        students, tutors = self.create_sample(writers)
+        try:
+            self.run('One tutor', writers, requests, students, [tutors[0]] * writers)
+            self.run('Tutor per writer', writers, requests, students, tutors)
+        finally:
+            Booking.objects.filter(tutor__in=tutors).delete()
+            User.objects.filter(pk__in=[user.pk for user in students + tutors]).delete()
+
+    def create_sample(self, writers):
+        # bulk_create skips the post_save signals, so no emails go out and
+        # the profiles are created explicitly
+        users = User.objects.bulk_create([
+            User(username=f'bench-reservations-{role}-{i}',
+                 email=f'bench-reservations-{role}-{i}@example.com')
+            for role in ('student', 'tutor') for i in range(writers)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, is_tutor=i >= writers, tutor_approved=i >= writers)
+            for i, user in enumerate(users)
+        ])
+        return users[:writers], users[writers:]
+
+    def run(self, label, writers, requests, students, tutors):
+        start = timezone.now().replace(microsecond=0) + timezone.timedelta(days=1)
+        barrier = threading.Barrier(writers)
+        latencies, rejected = [], []
+
+        def write(index):
+            barrier.wait()
+            try:
+                for request in range(requests):
+                    # Every request is for a free slot of its tutor, so the
+                    # writers contend for the tutor's lock, not for slots
+                    slot = start + timezone.timedelta(hours=2 * (request * writers + index))
+                    serializer = BookingSerializer(data={
+                        'student_id': students[index].pk,
+                        'tutor_id': tutors[index].pk,
+                        'topic': 'Benchmark session',
+                        'start_time': slot.isoformat(),
+                        'duration_minutes': 60,
+                    })
+                    began = time.perf_counter()
+                    if serializer.is_valid():
+                        serializer.save()
+                    else:
+                        rejected.append(serializer.errors)
+                    latencies.append(time.perf_counter() - began)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write, args=(index,)) for index in range(writers)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        overlaps = self.count_overlaps(set(tutors))
+        if overlaps:
+            raise CommandError(f'{label}: {overlaps} overlapping bookings')
+        Booking.objects.filter(tutor__in=set(tutors)).delete()
+
+        latencies.sort()
+        written = len(latencies) - len(rejected)
+        self.stdout.write(
+            f'{label}: {written} bookings by {writers} writers in {elapsed:.2f}s, '
+            f'{written / elapsed:.0f} writes/s, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, {len(rejected)} rejected'
+        )
+        self.stdout.write(self.style.SUCCESS(f'{label}: no overlapping bookings'))
+
+    def count_overlaps(self, tutors):
+        overlaps = 0
+        for tutor in tutors:
+            intervals = list(
+                Booking.objects.filter(tutor=tutor, status__in=Booking.ACTIVE_STATUSES)
+                .order_by('start_time').values_list('start_time', 'end_time')
+            )
+            overlaps += sum(
+                next_start < previous_end
+                for (_, previous_end), (next_start, _) in zip(intervals, intervals[1:])
+            )
+        return overlaps
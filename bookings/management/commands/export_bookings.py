@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from bookings.export import STREAMS, get_export_querysets
+from bookings.models import Booking
+
+
+def parse_moment(value):
+    """Parse an ISO date or datetime into an aware datetime"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Invalid date: {value}')
+        moment = timezone.datetime.combine(day, timezone.datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings, archived ones included, to CSV or NDJSON for billing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(STREAMS), default='csv')
+        parser.add_argument('--start', help='Only sessions starting at or after this date')
+        parser.add_argument('--end', help='Only sessions starting before this date')
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=[choice for choice, _ in Booking.STATUS_CHOICES],
+            help='Only bookings with this status (can be repeated)',
+        )
+        parser.add_argument('--output', help='File to write to (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        querysets = get_export_querysets(
+            start=parse_moment(options['start']) if options['start'] else None,
+            end=parse_moment(options['end']) if options['end'] else None,
+            statuses=options['status'],
+        )
+        chunks = STREAMS[options['format']](querysets, options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
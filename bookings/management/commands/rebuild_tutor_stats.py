@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.stats import rebuild_tutor_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized tutor stats from the bookings and archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tutor',
+            type=int,
+            action='append',
+            dest='tutor_ids',
+            help='Only rebuild this tutor (can be repeated)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of stats rows inserted per query',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_tutor_stats(
+            tutor_ids=options['tutor_ids'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {count} tutors in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = 'Queue reminder emails for confirmed sessions that start soon'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lead-minutes',
+            type=int,
+            help='Minutes before the session to send the reminder (defaults to BOOKING_REMINDER_MINUTES)',
+        )
+        parser.add_argument(
+            '--horizon-hours',
+            type=float,
+            default=6,
+            help='How far past the reminder lead time sessions are held in memory',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, ticking every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30,
+            help='Seconds between ticks with --loop',
+        )
+
+    def handle(self, *args, **options):
+        lead = None
+        if options['lead_minutes'] is not None:
+            lead = timezone.timedelta(minutes=options['lead_minutes'])
+        scheduler = ReminderScheduler(
+            lead=lead,
+            horizon=timezone.timedelta(hours=options['horizon_hours']),
+        )
+
+        while True:
+            started = time.monotonic()
+            sent = scheduler.tick()
+            elapsed = time.monotonic() - started
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Queued reminders for {sent} sessions in {elapsed:.3f}s '
+                    f'({len(scheduler.heap)} scheduled)'
+                ))
+
+            if not options['loop']:
+                break
+            time.sleep(max(0, options['interval'] - elapsed))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.lifecycle import sweep_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        'Expire pending bookings and waitlist entries whose session has started '
+        'and mark finished confirmed bookings as awaiting completion'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of bookings updated per UPDATE statement',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks, to leave room for other writers',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, sweeping every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between sweeps with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            counts = sweep_bookings(
+                chunk_size=options['chunk_size'],
+                pause=options['pause'],
+            )
+            elapsed = time.monotonic() - started
+            summary = ', '.join(f'{count} {status}' for status, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f'Swept bookings: {summary} in {elapsed:.2f}s'))
+
+            if not options['loop']:
+                break
+            time.sleep(max(0, options['interval'] - elapsed))
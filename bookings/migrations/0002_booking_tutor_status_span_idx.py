@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='bookings_bo_tutor_i_74ff9d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['tutor', 'status', 'start_time', 'end_time'], name='booking_tutor_status_span_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorSubject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tutor_subjects', to='bookings.subject')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tutor_subjects', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['subject__name'],
+                'indexes': [models.Index(fields=['subject', 'tutor'], name='tutor_subject_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tutor', 'subject'), name='unique_tutor_subject')],
+            },
+        ),
+    ]
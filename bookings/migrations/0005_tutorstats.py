@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookings', '0004_tutorsubject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorStats',
+            fields=[
+                ('tutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tutor_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('no_show_count', models.PositiveIntegerField(default=0)),
+                ('minutes_taught', models.PositiveIntegerField(default=0)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tutor Stats',
+                'verbose_name_plural': 'Tutor Stats',
+                'indexes': [models.Index(fields=['-average_rating', '-tutor'], name='tutor_stats_rating_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_tutorstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at', 'id'], name='booking_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookings', '0006_booking_updated_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorScheduleLock',
+            fields=[
+                ('tutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='schedule_lock', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_lifecycle_statuses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_sent_for',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booking_reminder_sent_for'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('topic', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('duration_minutes', models.PositiveIntegerField()),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('is_virtual', models.BooleanField()),
+                ('meeting_link', models.URLField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('no_show', 'No Show'), ('expired', 'Expired'), ('awaiting_completion', 'Awaiting Completion')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('cancellation_reason', models.TextField(blank=True)),
+                ('hourly_rate', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_paid', models.BooleanField()),
+                ('student_rating', models.PositiveIntegerField(blank=True, null=True)),
+                ('student_review', models.TextField(blank=True)),
+                ('tutor_feedback', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('cancelled_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_cancelled_bookings', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_student_bookings', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='bookings.subject')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tutor_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archive_created_id_idx')],
+            },
+        ),
+    ]
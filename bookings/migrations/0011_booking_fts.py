@@ -0,0 +1,40 @@
+from django.db import migrations, OperationalError
+
+FTS_TABLE = 'bookings_booking_fts'
+
+
+def create_fts_index(apps, schema_editor):
+    """Create and fill the FTS5 index; other backends use the LIKE fallback"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "topic, description, student_review, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5
+            return
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, topic, description, student_review) "
+            "SELECT id, topic, description, student_review FROM bookings_booking"
+        )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
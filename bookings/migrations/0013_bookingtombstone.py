@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField()),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('archived', 'Archived')], max_length=10)),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_booking_tombstones', to=settings.AUTH_USER_MODEL)),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tutor_booking_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['removed_at', 'booking_id'],
+                'indexes': [models.Index(fields=['removed_at', 'booking_id'], name='tombstone_removed_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations, OperationalError
+
+FTS_TABLE = 'bookings_booking_fts'
+TOKENIZE = "tokenize = 'porter unicode61 remove_diacritics 2'"
+
+
+def fts_exists(cursor, connection):
+    return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def add_owners_column(apps, schema_editor):
+    """Recreate the FTS5 index with an owners column and refill it"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if not fts_exists(cursor, connection):
+            # SQLite built without FTS5
+            return
+        cursor.execute(f'DROP TABLE {FTS_TABLE}')
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"topic, description, student_review, owners, {TOKENIZE})"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, topic, description, student_review, owners) "
+            "SELECT id, topic, description, student_review, "
+            "'u' || student_id || ' u' || tutor_id FROM bookings_booking"
+        )
+
+
+def remove_owners_column(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if not fts_exists(cursor, connection):
+            return
+        cursor.execute(f'DROP TABLE {FTS_TABLE}')
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"topic, description, student_review, {TOKENIZE})"
+            )
+        except OperationalError:
+            return
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, topic, description, student_review) "
+            "SELECT id, topic, description, student_review FROM bookings_booking"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_bookingtombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_owners_column, remove_owners_column),
+    ]
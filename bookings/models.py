@@ -1,4 +1,6 @@
 # bookings/models.py
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -26,8 +28,20 @@ class Booking(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
         ('no_show', 'No Show'),
+        ('expired', 'Expired'),
+        ('awaiting_completion', 'Awaiting Completion'),
     ]
     
+    # Statuses that occupy a slot in the tutor's calendar
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    
+    # Statuses only set by the lifecycle sweeper, never through the API
+    SYSTEM_STATUSES = ('expired', 'awaiting_completion')
+    
+    # Upper bound on a session's length; conflict lookups rely on it to
+    # bound their index range scan on start_time
+    MAX_DURATION_MINUTES = 240
+    
     student = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -52,7 +66,7 @@ class Booking(models.Model):
     description = models.TextField(blank=True)
     duration_minutes = models.PositiveIntegerField(
         default=60,
-        validators=[MinValueValidator(30), MaxValueValidator(240)]
+        validators=[MinValueValidator(30), MaxValueValidator(MAX_DURATION_MINUTES)]
     )
     
     # Scheduling
@@ -78,6 +92,10 @@ class Booking(models.Model):
     )
     cancellation_reason = models.TextField(blank=True)
     
+    # Start time the reminder was sent for; a rescheduled session no longer
+    # matches it and is reminded again
+    reminder_sent_for = models.DateTimeField(null=True, blank=True)
+    
     # Payment (optional for now)
     hourly_rate = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -95,22 +113,304 @@ class Booking(models.Model):
     def __str__(self):
         return f"{self.student.email} - {self.tutor.email} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
     
-    def save(self, *args, **kwargs):
+    @classmethod
+    def compute_end_time(cls, start_time, duration_minutes=None):
+        """Return the end of a session starting at start_time"""
+        if duration_minutes is None:
+            duration_minutes = cls._meta.get_field('duration_minutes').default
+        return start_time + timezone.timedelta(minutes=duration_minutes)
+    
+    def populate_derived_fields(self):
+        """Fill in fields derived from the schedule and rate"""
         # Auto-calculate end_time if not provided
         if self.start_time and not self.end_time:
-            self.end_time = self.start_time + timezone.timedelta(minutes=self.duration_minutes)
+            self.end_time = self.compute_end_time(self.start_time, self.duration_minutes)
         
         # Auto-calculate total amount
         if not self.total_amount:
-            hours = self.duration_minutes / 60
+            hours = Decimal(self.duration_minutes) / 60
             self.total_amount = self.hourly_rate * hours
-        
+    
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
         super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-start_time']
         indexes = [
             models.Index(fields=['student', 'status']),
-            models.Index(fields=['tutor', 'status']),
+            # Covers tutor conflict checks: tutor + active status + time range
+            models.Index(
+                fields=['tutor', 'status', 'start_time', 'end_time'],
+                name='booking_tutor_status_span_idx'
+            ),
             models.Index(fields=['start_time']),
-        ]
\ No newline at end of file
+            # Keyset pagination of booking lists
+            models.Index(fields=['-created_at', '-id'], name='booking_created_id_idx'),
+            # Delta-sync changes feed
+            models.Index(fields=['updated_at', 'id'], name='booking_updated_id_idx'),
+            # Lifecycle sweeper: bookings of a status whose session has started
+            models.Index(fields=['status', 'start_time'], name='booking_status_start_idx'),
+        ]
+
+class TutorSubject(models.Model):
+    """Subject an approved tutor offers to teach"""
+    tutor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tutor_subjects'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='tutor_subjects'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.tutor.email} - {self.subject.name}"
+    
+    class Meta:
+        ordering = ['subject__name']
+        constraints = [
+            models.UniqueConstraint(fields=['tutor', 'subject'], name='unique_tutor_subject'),
+        ]
+        indexes = [
+            # Tutor discovery by subject
+            models.Index(fields=['subject', 'tutor'], name='tutor_subject_lookup_idx'),
+        ]
+
+class TutorStats(models.Model):
+    """Denormalized per-tutor rating and workload aggregates"""
+    tutor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='tutor_stats'
+    )
+    
+    # Ratings
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    
+    # Workload
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    no_show_count = models.PositiveIntegerField(default=0)
+    minutes_taught = models.PositiveIntegerField(default=0)
+    earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.tutor.email} - {self.average_rating:.2f}"
+    
+    @property
+    def hours_taught(self):
+        return self.minutes_taught / 60
+    
+    class Meta:
+        verbose_name = 'Tutor Stats'
+        verbose_name_plural = 'Tutor Stats'
+        indexes = [
+            models.Index(fields=['-average_rating', '-tutor'], name='tutor_stats_rating_idx'),
+        ]
+
+class TutorScheduleLock(models.Model):
+    """Per-tutor row locked while a booking for that tutor is checked and written"""
+    tutor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='schedule_lock'
+    )
+    # Bumped by every reservation; the write is what takes the lock
+    version = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.tutor.email} - v{self.version}"
+
+class ArchivedBooking(models.Model):
+    """
+    Cold storage for finished bookings past the archive cutoff.
+    
+    Keeps the id and field names of Booking, so booking queries and
+    serializers work on either table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_student_bookings'
+    )
+    tutor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_tutor_bookings'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='archived_bookings'
+    )
+    
+    topic = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    duration_minutes = models.PositiveIntegerField()
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    location = models.CharField(max_length=200, blank=True)
+    is_virtual = models.BooleanField()
+    meeting_link = models.URLField(max_length=500, blank=True)
+    
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    cancelled_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_cancelled_bookings'
+    )
+    cancellation_reason = models.TextField(blank=True)
+    
+    hourly_rate = models.DecimalField(max_digits=8, decimal_places=2)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    is_paid = models.BooleanField()
+    
+    student_rating = models.PositiveIntegerField(null=True, blank=True)
+    student_review = models.TextField(blank=True)
+    tutor_feedback = models.TextField(blank=True)
+    
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    # Booking fields copied into the archive
+    ARCHIVED_FIELDS = (
+        'id', 'student_id', 'tutor_id', 'subject_id', 'topic', 'description',
+        'duration_minutes', 'start_time', 'end_time', 'location', 'is_virtual',
+        'meeting_link', 'status', 'created_at', 'updated_at', 'cancelled_at',
+        'cancelled_by_id', 'cancellation_reason', 'hourly_rate', 'total_amount',
+        'is_paid', 'student_rating', 'student_review', 'tutor_feedback',
+    )
+    
+    def __str__(self):
+        return f"Archived #{self.pk} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+    
+    class Meta:
+        ordering = ['-start_time']
+        indexes = [
+            # Keyset pagination of booking lists that include the archive
+            models.Index(fields=['-created_at', '-id'], name='archive_created_id_idx'),
+        ]
+
+class BookingTombstone(models.Model):
+    """
+    Marker left behind by a booking removed from the hot table.
+    
+    The changes feed reports these so clients drop bookings that were
+    deleted or moved to the archive.
+    """
+    
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),
+    ]
+    
+    booking_id = models.BigIntegerField()
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='student_booking_tombstones'
+    )
+    tutor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tutor_booking_tombstones'
+    )
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    removed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Booking #{self.booking_id} {self.reason}"
+    
+    class Meta:
+        ordering = ['removed_at', 'booking_id']
+        indexes = [
+            # Delta-sync changes feed
+            models.Index(fields=['removed_at', 'booking_id'], name='tombstone_removed_id_idx'),
+        ]
+
+class WaitlistEntry(models.Model):
+    """A student's request for a tutor slot that was taken, queued in arrival order"""
+    
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('withdrawn', 'Withdrawn'),
+        ('expired', 'Expired'),
+    ]
+    
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    tutor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tutor_waitlist_entries'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entries'
+    )
+    
+    # Details copied onto the booking on promotion
+    topic = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    duration_minutes = models.PositiveIntegerField(
+        default=60,
+        validators=[MinValueValidator(30), MaxValueValidator(Booking.MAX_DURATION_MINUTES)]
+    )
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    location = models.CharField(max_length=200, blank=True)
+    is_virtual = models.BooleanField(default=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    booking = models.OneToOneField(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.student.email} waiting for {self.tutor.email} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+    
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'tutor', 'start_time'],
+                condition=models.Q(status='waiting'),
+                name='unique_waiting_entry'
+            ),
+        ]
+        indexes = [
+            # Promotion: waiting entries of a tutor overlapping a freed slot
+            models.Index(fields=['tutor', 'status', 'start_time'], name='waitlist_tutor_slot_idx'),
+            # Lifecycle sweeper: waiting entries whose session has started
+            models.Index(fields=['status', 'start_time'], name='waitlist_status_start_idx'),
+        ]
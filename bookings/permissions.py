@@ -1,10 +1,12 @@
 from rest_framework import permissions
 
+from accounts.permissions import is_approved_tutor
+
 class IsBookingOwner(permissions.BasePermission):
     """Check if user is owner of booking (student or tutor)"""
     
     def has_object_permission(self, request, view, obj):
-        return obj.student == request.user or obj.tutor == request.user
+        return request.user.pk in (obj.student_id, obj.tutor_id)
 
 class IsTutorOrAdmin(permissions.BasePermission):
     """Check if user is tutor or admin"""
@@ -13,7 +15,5 @@ class IsTutorOrAdmin(permissions.BasePermission):
         return bool(
             request.user and
             request.user.is_authenticated and
-            (request.user.is_staff or 
-             hasattr(request.user, 'profile') and 
-             request.user.profile.tutor_approved)
+            (request.user.is_staff or is_approved_tutor(request.user))
         )
\ No newline at end of file
@@ -0,0 +1,134 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.outbox import enqueue_email
+from core.pagination import keyset_filter
+
+from .models import Booking
+
+# Changes younger than this are not consumed yet, so that transactions still
+# in flight cannot commit behind the scheduler's position
+SETTLE_SECONDS = 2
+
+
+class ReminderScheduler:
+    """
+    Send a reminder email `lead` before each confirmed session.
+
+    Only sessions starting within the next lead + horizon are held, in a
+    min-heap keyed on the time their reminder is due; the window slides
+    forward through the (status, start_time) index as time passes. Bookings
+    created, rescheduled, confirmed or cancelled after loading are picked up
+    from the (updated_at, id) index, the same feed as the changes endpoint.
+    Heap entries are never removed in place: a stale entry is dropped when
+    it comes due and the booking no longer matches it. A tick therefore
+    costs O(changes + due reminders), independent of the table size.
+
+    Booking.reminder_sent_for is set in the same transaction as the queued
+    emails, and the outbox dedup keys cover the same (booking, start time),
+    so restarts and concurrent schedulers never send a reminder twice.
+    """
+
+    def __init__(self, lead=None, horizon=None):
+        self.lead = lead or timezone.timedelta(minutes=settings.BOOKING_REMINDER_MINUTES)
+        self.horizon = horizon or timezone.timedelta(hours=6)
+        self.heap = []
+        self.loaded_until = None
+        self.position = None
+
+    def tick(self, now=None):
+        """Bring the heap up to date and send the reminders now due; returns how many"""
+        now = now or timezone.now()
+        if self.loaded_until is None:
+            self.start(now)
+        else:
+            self.consume_changes(now)
+        self.extend_window(now)
+        return self.fire_due(now)
+
+    def start(self, now):
+        # Changes from here on are replayed on the next tick; pushing a
+        # booking twice is harmless since due entries are re-checked
+        self.position = [now - timezone.timedelta(seconds=SETTLE_SECONDS), 0]
+        self.loaded_until = now
+
+    def extend_window(self, now):
+        """Load the sessions that entered the window since the last tick"""
+        window_end = now + self.lead + self.horizon
+        if window_end <= self.loaded_until:
+            return
+        rows = Booking.objects.filter(
+            status='confirmed',
+            start_time__gt=self.loaded_until,
+            start_time__lte=window_end,
+        ).values_list('id', 'start_time', 'reminder_sent_for')
+        for booking_id, start_time, reminder_sent_for in rows:
+            self.push(booking_id, start_time, reminder_sent_for)
+        self.loaded_until = window_end
+
+    def consume_changes(self, now):
+        """Push bookings updated since the last tick that now need a reminder"""
+        ordering = ('updated_at', 'id')
+        rows = Booking.objects.filter(
+            keyset_filter(ordering, self.position),
+            updated_at__lte=now - timezone.timedelta(seconds=SETTLE_SECONDS),
+        ).order_by(*ordering).values_list(
+            'updated_at', 'id', 'status', 'start_time', 'reminder_sent_for'
+        )
+        for updated_at, booking_id, status_value, start_time, reminder_sent_for in rows.iterator():
+            self.position = [updated_at, booking_id]
+            # Later sessions are loaded when the window reaches them
+            if status_value == 'confirmed' and start_time <= self.loaded_until:
+                self.push(booking_id, start_time, reminder_sent_for)
+
+    def push(self, booking_id, start_time, reminder_sent_for):
+        if reminder_sent_for != start_time:
+            heapq.heappush(self.heap, (start_time - self.lead, booking_id, start_time))
+
+    def fire_due(self, now):
+        due = {}
+        while self.heap and self.heap[0][0] <= now:
+            _, booking_id, start_time = heapq.heappop(self.heap)
+            due[booking_id] = start_time
+        if not due:
+            return 0
+
+        rows = Booking.objects.filter(
+            id__in=due, status='confirmed', start_time__gt=now
+        ).values(
+            'id', 'topic', 'start_time', 'reminder_sent_for',
+            'student__email', 'student__first_name',
+            'tutor__email', 'tutor__first_name',
+        )
+        sent = 0
+        for row in rows:
+            # Rescheduled since it was pushed, or already reminded
+            if row['start_time'] != due[row['id']] or row['reminder_sent_for'] == row['start_time']:
+                continue
+            sent += self.send(row)
+        return sent
+
+    def send(self, row):
+        with transaction.atomic():
+            claimed = Booking.objects.filter(
+                id=row['id'], status='confirmed', start_time=row['start_time']
+            ).exclude(reminder_sent_for=row['start_time']).update(
+                reminder_sent_for=row['start_time']
+            )
+            if not claimed:
+                return 0
+
+            start = timezone.localtime(row['start_time']).strftime('%Y-%m-%d %H:%M')
+            for role, other in (('student', 'tutor'), ('tutor', 'student')):
+                enqueue_email(
+                    f"reminder:{row['id']}:{row['start_time'].isoformat()}:{role}",
+                    row[f'{role}__email'],
+                    "Upcoming session reminder",
+                    f"Hello {row[f'{role}__first_name']},\n"
+                    f"Your session \"{row['topic']}\" with {row[f'{other}__first_name']} "
+                    f"starts at {start}.\n"
+                )
+        return 1
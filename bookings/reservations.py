@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.db import OperationalError, transaction
+from django.db.models import F
+
+from .models import TutorScheduleLock
+
+# Lock contention reported by the database (SQLite "database is locked",
+# deadlocks, serialization failures) is retried with full-jitter exponential
+# backoff for up to RESERVATION_TIMEOUT_SECONDS, matching SQLite's default
+# busy timeout
+RESERVATION_TIMEOUT_SECONDS = 5
+BACKOFF_BASE_SECONDS = 0.002
+BACKOFF_MAX_SECONDS = 0.05
+
+
+def lock_tutor_schedule(tutor_id):
+    """
+    Take the tutor's schedule lock until the current transaction ends.
+
+    The lock is a write to the tutor's TutorScheduleLock row: a server
+    database holds that row lock until commit, so reservations for the same
+    tutor queue up while other tutors are unaffected. On SQLite the write
+    takes the database write lock, so it must be the first statement of
+    the transaction; the conflict check that follows then cannot interleave
+    with another writer.
+    """
+    queryset = TutorScheduleLock.objects.filter(tutor_id=tutor_id)
+    if not queryset.update(version=F('version') + 1):
+        TutorScheduleLock.objects.get_or_create(tutor_id=tutor_id)
+        queryset.update(version=F('version') + 1)
+
+
+def run_reserved(tutor_id, operation):
+    """
+    Run operation() in a transaction holding the tutor's schedule lock.
+
+    operation() must re-check availability before writing; it sees every
+    booking committed by earlier holders of the lock. Lock contention is
+    retried with bounded backoff, unless already inside an outer
+    transaction, which a retry could not restart.
+    """
+    nested = transaction.get_connection().in_atomic_block
+    deadline = time.monotonic() + RESERVATION_TIMEOUT_SECONDS
+    attempt = 0
+
+    while True:
+        try:
+            with transaction.atomic():
+                lock_tutor_schedule(tutor_id)
+                return operation()
+        except OperationalError:
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            if nested or time.monotonic() + delay > deadline:
+                raise
+            time.sleep(delay)
+            attempt += 1
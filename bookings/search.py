@@ -0,0 +1,226 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Booking
+
+# SQLite FTS5 table indexing the text of each booking, keyed by booking id.
+# Created by migration 0011 when the SQLite build has FTS5.
+FTS_TABLE = 'bookings_booking_fts'
+
+# Indexed booking fields, in FTS column order, with their ranking weights
+SEARCH_FIELDS = (
+    ('topic', 10),
+    ('description', 2),
+    ('student_review', 1),
+)
+
+# Last FTS column: a token per user owning the booking (see owner_token),
+# so a user's own bookings are found through the index
+OWNERS_COLUMN = 'owners'
+OWNER_FIELDS = ('student', 'tutor')
+OWNERS_SQL = "'u' || student_id || ' u' || tutor_id"
+
+# Number of most recent matches ranked by relevance when searching all
+# bookings
+RANK_WINDOW = 200
+
+# Words matching fewer bookings than this are scanned in full when the
+# search is restricted to some bookings
+SCAN_LIMIT = 20000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts_available = None
+
+
+def fts_available():
+    """Whether the FTS5 index exists on this database"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def build_match_query(text):
+    """
+    Turn user input into a safe FTS5 query.
+
+    Every word must match, after stemming, so "integral" finds
+    "integrals". Only word characters are kept and each one is quoted,
+    so FTS5 operators in the input are searched for as plain words. Only
+    the text columns are searched, never the owners column.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    columns = ' '.join(name for name, _ in SEARCH_FIELDS)
+    phrases = ' '.join(f'"{token}"' for token in tokens)
+    return f'{{{columns}}} : ({phrases})'
+
+
+def owner_token(user_id):
+    """The token marking a user's bookings in the owners column"""
+    return f'u{user_id}'
+
+
+def index_bookings(bookings):
+    """Add or refresh the index rows of the given bookings"""
+    if not fts_available():
+        return
+    columns = ', '.join([name for name, _ in SEARCH_FIELDS] + [OWNERS_COLUMN])
+    placeholders = ', '.join(['%s'] * (len(SEARCH_FIELDS) + 2))
+    rows = [
+        [booking.pk]
+        + [getattr(booking, name) or '' for name, _ in SEARCH_FIELDS]
+        + [f'{owner_token(booking.student_id)} {owner_token(booking.tutor_id)}']
+        for booking in bookings
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[row[0]] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES ({placeholders})', rows
+        )
+
+
+def unindex_bookings(booking_ids):
+    """Remove bookings from the index"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[booking_id] for booking_id in booking_ids]
+        )
+
+
+def rebuild_index():
+    """Re-index every booking from the bookings table; returns the row count"""
+    if not fts_available():
+        return 0
+    columns = ', '.join(name for name, _ in SEARCH_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, {columns}, {OWNERS_COLUMN}) '
+            f'SELECT id, {columns}, {OWNERS_SQL} FROM {Booking._meta.db_table}'
+        )
+        indexed = cursor.rowcount
+        # Merge the index segments written by the bulk insert
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def matching(queryset, text):
+    """Filter a booking queryset to the bookings matching the search text (unranked)"""
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    if fts_available():
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+    return queryset.filter(_fallback_filter(text))
+
+
+def search_bookings(queryset, text, limit, user_id=None):
+    """
+    Return the ids of the best `limit` bookings of queryset matching text.
+
+    Bookings are ranked by the weights of the fields the search matches
+    in, newest first among equals. The queryset restricts the candidates
+    (visibility, status, timeframe) through a subquery. Other backends
+    fall back to case-insensitive containment.
+
+    With user_id, only that user's bookings are searched: the owners
+    column narrows the match to them inside the index, so every match is
+    ranked at a cost bounded by the user's own bookings, however common
+    the words.
+
+    Without it (staff searching every booking) only the RANK_WINDOW most
+    recent matches are ranked, read newest first from the index, so a
+    common word costs as little as a rare one. This is a known recall
+    limit: once more than RANK_WINDOW newer bookings match, an older one
+    is not returned however strongly it matches.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    if not fts_available():
+        return _fallback_search(queryset, text, limit)
+
+    if user_id is not None:
+        match = f'{match} AND {OWNERS_COLUMN} : "{owner_token(user_id)}"'
+
+    # highlight() marks the matched terms of one column without the index
+    # wide statistics bm25() would gather for every query
+    score = ' + '.join(
+        f"{weight} * (instr(highlight({FTS_TABLE}, {column}, char(1), ''), char(1)) > 0)"
+        for column, (_, weight) in enumerate(SEARCH_FIELDS)
+    )
+    sql = f'SELECT rowid, {score} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [match]
+    if queryset.query.where:
+        # Restrict to the candidates. Few matches are cheapest to read in
+        # full and check against the candidate ids; for many SQLite probes
+        # the index once per candidate instead, which stays cheap for
+        # narrow filters. The unary + forces the former.
+        candidates, candidate_params = queryset.order_by().values('id').query.sql_with_params()
+        few = user_id is not None or _count_matches(match, SCAN_LIMIT) < SCAN_LIMIT
+        sql += f" AND {'+' if few else ''}rowid IN ({candidates})"
+        params.extend(candidate_params)
+    if user_id is None:
+        sql = f'SELECT rowid, score FROM ({sql} ORDER BY rowid DESC LIMIT %s)'
+        params.append(RANK_WINDOW)
+    sql = f'{sql} ORDER BY score DESC, rowid DESC LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _count_matches(match, limit):
+    """Number of bookings matching, counting no further than limit"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT count(*) FROM (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s LIMIT %s)',
+            [match, limit]
+        )
+        return cursor.fetchone()[0]
+
+
+def _fallback_filter(text):
+    condition = Q()
+    for token in TOKEN_RE.findall(text):
+        token_condition = Q()
+        for name, _ in SEARCH_FIELDS:
+            token_condition |= Q(**{f'{name}__icontains': token})
+        condition &= token_condition
+    return condition
+
+
+def _fallback_search(queryset, text, limit):
+    tokens = TOKEN_RE.findall(text)
+    score = Value(0)
+    for name, weight in SEARCH_FIELDS:
+        in_field = Q()
+        for token in tokens:
+            in_field |= Q(**{f'{name}__icontains': token})
+        score = score + Case(
+            When(in_field, then=Value(weight)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    return list(
+        queryset.filter(_fallback_filter(text))
+        .annotate(search_score=score)
+        .order_by('-search_score', '-id')
+        .values_list('id', flat=True)[:limit]
+    )
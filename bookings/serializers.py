@@ -1,14 +1,34 @@
 from rest_framework import serializers
-from .models import Booking, Subject
+from rest_framework.settings import api_settings
+from .models import Booking, Subject, TutorSubject, WaitlistEntry
+from .conflicts import find_conflicts, is_tutor_available
+from .reservations import run_reserved
+from .search import index_bookings
+from .stats import record_duration_change
+from .waitlist import join_waitlist
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from accounts.models import UserProfile
+from django.utils import timezone
+from core.fieldsets import SparseFieldsetMixin
 
-class SubjectSerializer(serializers.ModelSerializer):
+def validate_interval(start_time, end_time):
+    """Validate a session interval"""
+    if end_time <= start_time:
+        raise serializers.ValidationError("End time must be after start time.")
+    
+    if end_time - start_time > timezone.timedelta(minutes=Booking.MAX_DURATION_MINUTES):
+        raise serializers.ValidationError(
+            f"A session cannot be longer than {Booking.MAX_DURATION_MINUTES} minutes."
+        )
+
+class SubjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = ('id', 'name', 'code', 'description')
         read_only_fields = ('id',)
 
-class SimpleUserSerializer(serializers.ModelSerializer):
+class SimpleUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Simple user serializer for booking display"""
     full_name = serializers.SerializerMethodField()
     academic_year = serializers.CharField(source='profile.academic_year', read_only=True)
@@ -17,11 +37,12 @@ class SimpleUserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'email', 'full_name', 'academic_year')
         read_only_fields = ('id', 'email', 'full_name', 'academic_year')
+        fieldset_sources = {'full_name': ('first_name', 'last_name')}
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for bookings"""
     student = SimpleUserSerializer(read_only=True)
     tutor = SimpleUserSerializer(read_only=True)
@@ -31,7 +52,7 @@ class BookingSerializer(serializers.ModelSerializer):
         source='student'
     )
     tutor_id = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.filter(profile__tutor_approved=True),
+        queryset=User.objects.filter(profile__tutor_approved=True).select_related('profile'),
         write_only=True,
         source='tutor'
     )
@@ -54,30 +75,447 @@ class BookingSerializer(serializers.ModelSerializer):
             'is_paid', 'student_id', 'tutor_id',
             'student_rating', 'student_review', 'created_at'
         )
+        # Ratings go through submit_feedback, which keeps TutorStats in step
         read_only_fields = (
             'id', 'student', 'tutor', 'subject', 'status', 
-            'total_amount', 'is_paid', 'created_at'
+            'total_amount', 'is_paid', 'student_rating', 'created_at'
         )
+        extra_kwargs = {
+            # Computed from start_time + duration_minutes when omitted
+            'end_time': {'required': False},
+        }
     
     def validate(self, data):
         """Validate booking data"""
-        if data['student'] == data['tutor']:
+        instance = self.instance
+        student = data.get('student', getattr(instance, 'student', None))
+        tutor = data.get('tutor', getattr(instance, 'tutor', None))
+        
+        if student == tutor:
             raise serializers.ValidationError("Student and tutor cannot be the same person.")
         
-        # Check if tutor is available (simple check - can be enhanced later)
-        existing_booking = Booking.objects.filter(
-            tutor=data['tutor'],
-            start_time__lt=data.get('end_time', data['start_time']),
-            end_time__gt=data['start_time'],
-            status__in=['pending', 'confirmed']
-        ).exists()
+        start_time = data.get('start_time', getattr(instance, 'start_time', None))
+        end_time = data.get('end_time')
+        if end_time is None:
+            if instance and 'start_time' not in data and 'duration_minutes' not in data:
+                end_time = instance.end_time
+            else:
+                # Compute the end time now so the conflict check sees the real interval
+                end_time = Booking.compute_end_time(
+                    start_time,
+                    data.get('duration_minutes', getattr(instance, 'duration_minutes', None))
+                )
+                data['end_time'] = end_time
         
-        if existing_booking:
-            raise serializers.ValidationError("Tutor is not available at this time.")
+        validate_interval(start_time, end_time)
         
+        # Tutor availability is checked by create()/update() while holding
+        # the tutor's schedule lock; a check here could be stale by then
         return data
+    
+    def create(self, validated_data):
+        """Create the booking once the slot is confirmed free under the tutor's lock"""
+        def reserve():
+            self.check_availability(validated_data)
+            return super(BookingSerializer, self).create(validated_data)
+        
+        return run_reserved(validated_data['tutor'].pk, reserve)
+    
+    def update(self, instance, validated_data):
+        """Reschedule the booking once the slot is confirmed free under the tutor's lock"""
+        old_duration = instance.duration_minutes
+        
+        def reserve():
+            self.check_availability(validated_data, instance)
+            booking = super(BookingSerializer, self).update(instance, validated_data)
+            record_duration_change(booking, old_duration)
+            return booking
+        
+        tutor = validated_data.get('tutor', instance.tutor)
+        return run_reserved(tutor.pk, reserve)
+    
+    @staticmethod
+    def check_availability(data, instance=None):
+        """Reject the booking when its interval overlaps another active booking"""
+        tutor = data.get('tutor', getattr(instance, 'tutor', None))
+        start_time = data.get('start_time', getattr(instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(instance, 'end_time', None))
+        exclude_ids = [instance.pk] if instance else ()
+        if not is_tutor_available(tutor, start_time, end_time, exclude_ids):
+            # Same response shape as an error raised from validate()
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ["Tutor is not available at this time."]
+            })
 
 class BookingStatusUpdateSerializer(serializers.Serializer):
     """Serializer for updating booking status"""
-    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES)
-    cancellation_reason = serializers.CharField(required=False, allow_blank=True)
\ No newline at end of file
+    status = serializers.ChoiceField(choices=[
+        choice for choice in Booking.STATUS_CHOICES
+        if choice[0] not in Booking.SYSTEM_STATUSES
+    ])
+    cancellation_reason = serializers.CharField(required=False, allow_blank=True)
+
+class BookingFeedbackSerializer(serializers.Serializer):
+    """Serializer for student feedback on a completed booking"""
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+    review = serializers.CharField(required=False, allow_blank=True)
+
+class IntervalSerializer(serializers.Serializer):
+    """Serializer for a proposed session interval"""
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField(required=False)
+    duration_minutes = serializers.IntegerField(
+        required=False,
+        min_value=30,
+        max_value=Booking.MAX_DURATION_MINUTES
+    )
+    
+    def validate(self, data):
+        """Fill in the end time from the duration when it is omitted"""
+        if 'end_time' not in data:
+            data['end_time'] = Booking.compute_end_time(
+                data['start_time'], data.get('duration_minutes')
+            )
+        validate_interval(data['start_time'], data['end_time'])
+        return data
+
+class AvailabilityCheckSerializer(serializers.Serializer):
+    """Serializer for checking a tutor's availability for one or many intervals"""
+    tutor_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(profile__tutor_approved=True).select_related('profile'),
+        source='tutor'
+    )
+    intervals = IntervalSerializer(many=True, allow_empty=False)
+    
+    def get_results(self):
+        """Check all intervals against the tutor's calendar in one query"""
+        intervals = self.validated_data['intervals']
+        conflicts = find_conflicts(
+            self.validated_data['tutor'],
+            [(interval['start_time'], interval['end_time']) for interval in intervals]
+        )
+        return [
+            {
+                'start_time': interval['start_time'],
+                'end_time': interval['end_time'],
+                'available': not conflicting,
+            }
+            for interval, conflicting in zip(intervals, conflicts)
+        ]
+
+class RecurrenceSerializer(serializers.Serializer):
+    """Serializer for an RRULE-like recurrence pattern"""
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+    ]
+    
+    start_time = serializers.DateTimeField()
+    frequency = serializers.ChoiceField(choices=FREQUENCY_CHOICES, default='weekly')
+    interval = serializers.IntegerField(min_value=1, default=1)
+    count = serializers.IntegerField(min_value=1, required=False)
+    until = serializers.DateTimeField(required=False)
+    
+    def validate(self, data):
+        """Require a bound on the number of occurrences"""
+        if 'count' not in data and 'until' not in data:
+            raise serializers.ValidationError("Either count or until is required.")
+        return data
+    
+    @staticmethod
+    def get_occurrences(data, limit):
+        """Expand a validated pattern into at most `limit` + 1 start times"""
+        days = 7 if data['frequency'] == 'weekly' else 1
+        step = timezone.timedelta(days=days * data['interval'])
+        count = min(data.get('count', limit + 1), limit + 1)
+        until = data.get('until')
+        
+        occurrences = []
+        start_time = data['start_time']
+        while len(occurrences) < count and (until is None or start_time <= until):
+            occurrences.append(start_time)
+            start_time += step
+        return occurrences
+
+class BulkBookingSerializer(serializers.Serializer):
+    """Serializer for creating many sessions with the same tutor at once"""
+    MAX_SESSIONS = 60
+    
+    tutor_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(profile__tutor_approved=True).select_related('profile'),
+        source='tutor'
+    )
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        source='subject',
+        required=False,
+        allow_null=True
+    )
+    topic = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    duration_minutes = serializers.IntegerField(
+        min_value=30,
+        max_value=Booking.MAX_DURATION_MINUTES,
+        default=60
+    )
+    location = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    is_virtual = serializers.BooleanField(default=True)
+    meeting_link = serializers.URLField(max_length=500, required=False, allow_blank=True, default='')
+    hourly_rate = serializers.DecimalField(max_digits=8, decimal_places=2, default=0)
+    sessions = IntervalSerializer(many=True, required=False)
+    recurrence = RecurrenceSerializer(required=False)
+    all_or_nothing = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        """Expand sessions or the recurrence into a list of intervals"""
+        if ('sessions' in data) == ('recurrence' in data):
+            raise serializers.ValidationError("Provide either sessions or recurrence.")
+        
+        if 'sessions' in data:
+            intervals = [
+                (session['start_time'], session['end_time'])
+                for session in data.pop('sessions')
+            ]
+        else:
+            occurrences = RecurrenceSerializer.get_occurrences(
+                data.pop('recurrence'), self.MAX_SESSIONS
+            )
+            intervals = [
+                (start_time, Booking.compute_end_time(start_time, data['duration_minutes']))
+                for start_time in occurrences
+            ]
+        
+        if not intervals:
+            raise serializers.ValidationError("No sessions to create.")
+        if len(intervals) > self.MAX_SESSIONS:
+            raise serializers.ValidationError(
+                f"Cannot create more than {self.MAX_SESSIONS} sessions at once."
+            )
+        
+        data['intervals'] = intervals
+        return data
+    
+    def save(self, student):
+        """Conflict-check all intervals in one pass and insert the free ones"""
+        data = dict(self.validated_data)
+        intervals = data.pop('intervals')
+        all_or_nothing = data.pop('all_or_nothing')
+        tutor = data['tutor']
+        
+        if student == tutor:
+            raise serializers.ValidationError("Student and tutor cannot be the same person.")
+        
+        def reserve():
+            results = [{'index': index} for index in range(len(intervals))]
+            bookings = []
+            conflicts = find_conflicts(tutor, intervals)
+            
+            # Sweep the requested sessions in start order to catch overlaps
+            # between sessions of this same request
+            latest_end = None
+            for index in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+                start_time, end_time = intervals[index]
+                result = results[index]
+                result.update(start_time=start_time, end_time=end_time)
+                
+                if conflicts[index]:
+                    result['error'] = "Tutor is not available at this time."
+                elif latest_end is not None and start_time < latest_end:
+                    result['error'] = "Overlaps another session in this request."
+                else:
+                    latest_end = end_time
+                    duration = int((end_time - start_time).total_seconds() // 60)
+                    booking = Booking(
+                        student=student,
+                        start_time=start_time,
+                        end_time=end_time,
+                        **dict(data, duration_minutes=duration)
+                    )
+                    booking.populate_derived_fields()
+                    bookings.append((index, booking))
+            
+            failed = any('error' in result for result in results)
+            if not (all_or_nothing and failed):
+                created = Booking.objects.bulk_create([booking for _, booking in bookings])
+                # bulk_create sends no post_save, so index the new rows here
+                index_bookings(created)
+            return results, bookings
+        
+        results, bookings = run_reserved(tutor.pk, reserve)
+        
+        for index, booking in bookings:
+            result = results[index]
+            if booking.pk:
+                result.update(created=True, id=booking.pk)
+            else:
+                result.update(created=False, error="Not created because other sessions failed.")
+        for result in results:
+            result.setdefault('created', False)
+        
+        return results
+
+class SlotSearchSerializer(serializers.Serializer):
+    """Serializer for free-slot search query parameters"""
+    MAX_WINDOW_DAYS = 31
+    
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    duration_minutes = serializers.IntegerField(
+        min_value=30,
+        max_value=Booking.MAX_DURATION_MINUTES,
+        default=60
+    )
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=200, default=50)
+    
+    def validate(self, data):
+        """Validate the search window"""
+        if data['end'] <= data['start']:
+            raise serializers.ValidationError("End must be after start.")
+        
+        if data['end'] - data['start'] > timezone.timedelta(days=self.MAX_WINDOW_DAYS):
+            raise serializers.ValidationError(
+                f"The search window cannot be longer than {self.MAX_WINDOW_DAYS} days."
+            )
+        
+        return data
+
+class TutorSubjectSerializer(serializers.ModelSerializer):
+    """Serializer for the subjects a tutor offers"""
+    subject = SubjectSerializer(read_only=True)
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        write_only=True,
+        source='subject'
+    )
+    tutor_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(profile__tutor_approved=True).select_related('profile'),
+        source='tutor',
+        required=False
+    )
+    
+    class Meta:
+        model = TutorSubject
+        fields = ('id', 'tutor_id', 'subject', 'subject_id', 'created_at')
+        read_only_fields = ('id', 'subject', 'created_at')
+        # Uniqueness is checked in validate() once the tutor is known
+        validators = []
+    
+    def validate(self, data):
+        """Default the tutor to the current user and prevent duplicates"""
+        request = self.context['request']
+        tutor = data.get('tutor', request.user)
+        
+        if tutor != request.user and not request.user.is_staff:
+            raise serializers.ValidationError("You can only manage your own subjects.")
+        
+        if TutorSubject.objects.filter(tutor=tutor, subject=data['subject']).exists():
+            raise serializers.ValidationError("This subject is already on the tutor's list.")
+        
+        data['tutor'] = tutor
+        return data
+
+class TutorDiscoverySerializer(serializers.Serializer):
+    """Serializer for tutor discovery query parameters"""
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False)
+    academic_year = serializers.ChoiceField(
+        choices=UserProfile.ACADEMIC_YEAR_CHOICES,
+        required=False
+    )
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+
+class BookingExportSerializer(serializers.Serializer):
+    """Serializer for booking export query parameters"""
+    file_format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    status = serializers.CharField(required=False)
+    
+    def validate_status(self, value):
+        """Accept a comma separated list of statuses"""
+        statuses = [item.strip() for item in value.split(',') if item.strip()]
+        valid = {choice for choice, _ in Booking.STATUS_CHOICES}
+        invalid = [item for item in statuses if item not in valid]
+        if invalid:
+            raise serializers.ValidationError(f"Unknown status: {', '.join(invalid)}")
+        return statuses
+
+
+class BookingSearchSerializer(serializers.Serializer):
+    """Serializer for booking search query parameters"""
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class SubjectAutocompleteSerializer(serializers.Serializer):
+    """Serializer for subject autocomplete query parameters"""
+    q = serializers.CharField(max_length=100, allow_blank=True, trim_whitespace=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    words = serializers.BooleanField(default=True)
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """Serializer for waitlist entries"""
+    student = SimpleUserSerializer(read_only=True)
+    tutor = SimpleUserSerializer(read_only=True)
+    tutor_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(profile__tutor_approved=True).select_related('profile'),
+        write_only=True,
+        source='tutor'
+    )
+    subject_id = serializers.PrimaryKeyRelatedField(
+        queryset=Subject.objects.all(),
+        write_only=True,
+        source='subject',
+        required=False,
+        allow_null=True
+    )
+    subject = SubjectSerializer(read_only=True)
+    booking_id = serializers.PrimaryKeyRelatedField(source='booking', read_only=True)
+    position = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = (
+            'id', 'student', 'tutor', 'tutor_id', 'subject', 'subject_id',
+            'topic', 'description', 'duration_minutes', 'start_time', 'end_time',
+            'location', 'is_virtual', 'status', 'position', 'booking_id',
+            'created_at', 'promoted_at'
+        )
+        read_only_fields = ('id', 'end_time', 'status', 'created_at', 'promoted_at')
+    
+    def get_position(self, obj):
+        """1-based place in the queue for the slot, while waiting"""
+        if obj.status != 'waiting' or not hasattr(obj, 'entries_ahead'):
+            return None
+        return obj.entries_ahead + 1
+    
+    def validate(self, data):
+        """Validate the requested slot"""
+        student = self.context['request'].user
+        tutor = data['tutor']
+        
+        if student == tutor:
+            raise serializers.ValidationError("Student and tutor cannot be the same person.")
+        
+        start_time = data['start_time']
+        if start_time <= timezone.now():
+            raise serializers.ValidationError("Cannot join the waitlist for a session in the past.")
+        
+        data['end_time'] = Booking.compute_end_time(start_time, data.get('duration_minutes'))
+        validate_interval(start_time, data['end_time'])
+        
+        if WaitlistEntry.objects.filter(
+            student=student, tutor=tutor, start_time=start_time, status='waiting'
+        ).exists():
+            raise serializers.ValidationError("You are already on the waitlist for this slot.")
+        return data
+    
+    def create(self, validated_data):
+        """Queue the request, or book it straight away if the slot is free"""
+        entry = WaitlistEntry(**validated_data)
+        try:
+            return run_reserved(entry.tutor_id, lambda: join_waitlist(entry))
+        except IntegrityError:
+            # A concurrent request queued the same slot after validate()
+            raise serializers.ValidationError("You are already on the waitlist for this slot.")
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+
+from . import cache
+from .models import Booking, Subject
+from .search import OWNER_FIELDS, SEARCH_FIELDS, index_bookings, unindex_bookings
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subject_listing(sender, instance, **kwargs):
+    """Drop cached subject listings when a subject changes"""
+    # After commit, so no reader rebuilds the listing from the old rows
+    # and caches it under the new version
+    transaction.on_commit(lambda: cache.bump_version(cache.SUBJECTS))
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_tutor_listing(sender, instance, created, **kwargs):
+    """Drop cached tutor listings when a tutor's approval or year changes"""
+    if created:
+        changed = instance.tutor_approved
+    else:
+        changed = instance.has_changed('tutor_approved') or (
+            instance.tutor_approved and instance.has_changed('academic_year')
+        )
+
+    if changed:
+        transaction.on_commit(lambda: cache.bump_version(cache.TUTORS))
+
+
+@receiver(post_delete, sender=UserProfile)
+def invalidate_deleted_tutor_listing(sender, instance, **kwargs):
+    """Drop cached tutor listings when an approved tutor is deleted"""
+    if instance.tutor_approved:
+        transaction.on_commit(lambda: cache.bump_version(cache.TUTORS))
+
+
+@receiver(post_save, sender=User)
+def invalidate_tutor_listing_for_user(sender, instance, created, update_fields=None, **kwargs):
+    """Drop cached tutor listings when an approved tutor's name or email changes"""
+    if created or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+
+    profile = getattr(instance, 'profile', None)
+    if profile is not None and profile.tutor_approved:
+        transaction.on_commit(lambda: cache.bump_version(cache.TUTORS))
+
+
+@receiver(post_save, sender=Booking)
+def index_booking(sender, instance, update_fields=None, **kwargs):
+    """Refresh a booking's full-text index row when its text or owners may have changed"""
+    indexed = {name for name, _ in SEARCH_FIELDS} | set(OWNER_FIELDS)
+    if update_fields and not set(update_fields) & indexed:
+        return
+    index_bookings([instance])
+
+
+@receiver(post_delete, sender=Booking)
+def unindex_booking(sender, instance, **kwargs):
+    """Remove a deleted booking from the full-text index"""
+    unindex_bookings([instance.pk])
@@ -0,0 +1,85 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.utils import timezone
+
+from .models import Booking
+
+
+def subtract_intervals(window_start, window_end, busy, duration):
+    """
+    Return the gaps of at least `duration` left in the window by `busy`.
+
+    `busy` must be an iterable of (start, end) pairs sorted by start; they
+    may overlap each other and extend past the window.
+    """
+    free = []
+    cursor = window_start
+    for start_time, end_time in busy:
+        if start_time - cursor >= duration:
+            free.append((cursor, start_time))
+        if end_time > cursor:
+            cursor = end_time
+        if cursor >= window_end:
+            break
+    if window_end - cursor >= duration:
+        free.append((cursor, window_end))
+    return free
+
+
+def get_busy_intervals(tutor_ids, window_start, window_end):
+    """
+    Load the active bookings of a batch of tutors within a window.
+
+    All tutors of the batch are covered by one query, sorted by
+    (tutor, start_time). Returns a dict mapping tutor id to its sorted list
+    of (start, end) busy intervals.
+    """
+    max_duration = timezone.timedelta(minutes=Booking.MAX_DURATION_MINUTES)
+    rows = Booking.objects.filter(
+        tutor__in=tutor_ids,
+        status__in=Booking.ACTIVE_STATUSES,
+        start_time__gt=window_start - max_duration,
+        start_time__lt=window_end,
+        end_time__gt=window_start,
+    ).order_by('tutor_id', 'start_time').values_list('tutor_id', 'start_time', 'end_time')
+
+    return {
+        tutor_id: [(start_time, end_time) for _, start_time, end_time in group]
+        for tutor_id, group in groupby(rows.iterator(), key=itemgetter(0))
+    }
+
+
+def find_free_slots(tutors, window_start, window_end, duration, limit, batch_size=200):
+    """
+    Find up to `limit` tutors with free slots of at least `duration`.
+
+    `tutors` is a values() queryset of candidate tutors including 'id'. They
+    are walked in id order in batches; each batch costs two queries (tutor
+    rows and their bookings) however many tutors it holds, and the walk stops
+    as soon as enough tutors with a free slot have been found. Returns a list
+    of (tutor_row, free_slots) pairs.
+    """
+    tutors = tutors.order_by('id')
+    results = []
+    last_id = None
+    while len(results) < limit:
+        batch = tutors if last_id is None else tutors.filter(id__gt=last_id)
+        batch = list(batch[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]['id']
+
+        busy = get_busy_intervals([tutor['id'] for tutor in batch], window_start, window_end)
+        for tutor in batch:
+            free = subtract_intervals(
+                window_start, window_end, busy.get(tutor['id'], ()), duration
+            )
+            if free:
+                results.append((tutor, free))
+                if len(results) == limit:
+                    break
+
+        if len(batch) < batch_size:
+            break
+    return results
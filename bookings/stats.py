@@ -0,0 +1,160 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking, TutorStats
+
+# Booking statuses tracked by a counter on TutorStats
+STATUS_COUNTERS = {
+    'completed': 'completed_count',
+    'cancelled': 'cancelled_count',
+    'no_show': 'no_show_count',
+}
+
+
+def record_status_change(booking, old_status):
+    """Update the tutor's stats after a booking moved from old_status"""
+    if old_status == booking.status:
+        return
+
+    deltas = _status_deltas(booking, old_status, -1)
+    for field, delta in _status_deltas(booking, booking.status, 1).items():
+        deltas[field] = deltas.get(field, 0) + delta
+    apply_deltas(booking.tutor_id, deltas)
+
+
+def record_rating_change(booking, old_rating):
+    """Update the tutor's stats after a booking's student rating changed"""
+    new_rating = booking.student_rating
+    if old_rating == new_rating:
+        return
+
+    apply_deltas(booking.tutor_id, {
+        'rating_sum': (new_rating or 0) - (old_rating or 0),
+        'rating_count': (new_rating is not None) - (old_rating is not None),
+    })
+
+
+def record_duration_change(booking, old_duration):
+    """Update the tutor's stats after a booking's duration was edited"""
+    if booking.status != 'completed' or old_duration == booking.duration_minutes:
+        return
+
+    apply_deltas(booking.tutor_id, {'minutes_taught': booking.duration_minutes - old_duration})
+
+
+def record_deletion(booking):
+    """Remove a deleted booking's contribution from the tutor's stats"""
+    deltas = _status_deltas(booking, booking.status, -1)
+    if booking.student_rating is not None:
+        deltas['rating_sum'] = -booking.student_rating
+        deltas['rating_count'] = -1
+    apply_deltas(booking.tutor_id, deltas)
+
+
+def _status_deltas(booking, status_value, sign):
+    deltas = {}
+    counter = STATUS_COUNTERS.get(status_value)
+    if counter:
+        deltas[counter] = sign
+    if status_value == 'completed':
+        deltas['minutes_taught'] = sign * booking.duration_minutes
+        deltas['earnings'] = sign * Decimal(booking.total_amount)
+    return deltas
+
+
+def apply_deltas(tutor_id, deltas):
+    """
+    Atomically add deltas to a tutor's stats row.
+
+    Must run after the booking change has been saved, in the same
+    transaction: when the tutor has no stats row yet it is rebuilt from the
+    bookings table, which already includes the change.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    queryset = TutorStats.objects.filter(tutor_id=tutor_id)
+    if not _increment(queryset, deltas):
+        try:
+            with transaction.atomic():
+                rebuild_tutor_stats(tutor_ids=[tutor_id])
+            return
+        except IntegrityError:
+            # The row was created concurrently from committed bookings only,
+            # so this change still has to be applied to it
+            _increment(queryset, deltas)
+
+    if 'rating_sum' in deltas or 'rating_count' in deltas:
+        queryset.update(average_rating=Case(
+            When(rating_count__gt=0, then=Cast('rating_sum', FloatField()) / F('rating_count')),
+            default=Value(0.0),
+            output_field=FloatField()
+        ))
+
+
+def _increment(queryset, deltas):
+    return queryset.update(
+        updated_at=timezone.now(),
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def aggregate_tutor_stats(queryset):
+    """Aggregate a booking queryset into per-tutor stats rows"""
+    completed = Q(status='completed')
+    return queryset.order_by().values('tutor').annotate(
+        rating_sum=Coalesce(Sum('student_rating'), 0),
+        rating_count=Count('student_rating'),
+        completed_count=Count('id', filter=completed),
+        cancelled_count=Count('id', filter=Q(status='cancelled')),
+        no_show_count=Count('id', filter=Q(status='no_show')),
+        minutes_taught=Coalesce(Sum('duration_minutes', filter=completed), 0),
+        earnings=Coalesce(
+            Sum('total_amount', filter=completed),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    )
+
+
+def rebuild_tutor_stats(tutor_ids=None, batch_size=1000):
+    """
+    Recompute tutor stats from the bookings and archived bookings tables.
+
+    Rebuilds every tutor, or only `tutor_ids` when given. Returns the number
+    of stats rows written.
+    """
+    # Archived bookings still count towards a tutor's history
+    sources = [Booking.objects.all(), ArchivedBooking.objects.all()]
+    stats = TutorStats.objects.all()
+    if tutor_ids is not None:
+        sources = [queryset.filter(tutor_id__in=tutor_ids) for queryset in sources]
+        stats = stats.filter(tutor_id__in=tutor_ids)
+
+    totals = {}
+    for queryset in sources:
+        for row in aggregate_tutor_stats(queryset).iterator():
+            tutor_id = row.pop('tutor')
+            if tutor_id in totals:
+                for field, value in row.items():
+                    totals[tutor_id][field] += value
+            else:
+                totals[tutor_id] = row
+
+    rows = []
+    for tutor_id, row in totals.items():
+        row['average_rating'] = (
+            row['rating_sum'] / row['rating_count'] if row['rating_count'] else 0
+        )
+        rows.append(TutorStats(tutor_id=tutor_id, **row))
+
+    with transaction.atomic():
+        stats.delete()
+        TutorStats.objects.bulk_create(rows, batch_size=batch_size)
+
+    return len(rows)
@@ -1,3 +1,1126 @@
-from django.test import TestCase
+import csv
+import functools
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from accounts.models import EmailOutbox
+
+from . import cache, search
+from .archive import archive_bookings
+from .autocomplete import get_subject_index
+from .conflicts import find_conflicts
+from .export import iter_chunks
+from .lifecycle import sweep_bookings
+from .models import ArchivedBooking, Booking, BookingTombstone, Subject, TutorStats, TutorSubject, WaitlistEntry
+from .reminders import ReminderScheduler
+from .serializers import BookingSerializer, WaitlistEntrySerializer
+from .slots import find_free_slots, subtract_intervals
+from .stats import rebuild_tutor_stats
+from .views import BookingViewSet
+
+
+def make_user(email, tutor=False, staff=False):
+    user = User.objects.create_user(username=email, email=email, is_staff=staff)
+    if tutor:
+        user.profile.is_tutor = True
+        user.profile.tutor_approved = True
+        user.profile.save()
+    return user
+
+
+class BookingAPITestCase(TestCase):
+    """A tutor, a student signed in as the client, and a start time a week ahead"""
+    client_class = APIClient
+
+    def setUp(self):
+        self.tutor = make_user('tutor@example.com', tutor=True)
+        self.student = make_user('student@example.com')
+        self.client.force_authenticate(self.student)
+        self.start = (timezone.now() + timezone.timedelta(days=7)).replace(microsecond=0)
+
+    def at(self, minutes):
+        return self.start + timezone.timedelta(minutes=minutes)
+
+    def book(self, start_time, **fields):
+        """Create a booking directly, bypassing the API"""
+        fields.setdefault('topic', 'Exam prep')
+        return Booking.objects.create(
+            student=fields.pop('student', self.student),
+            tutor=fields.pop('tutor', self.tutor),
+            start_time=start_time,
+            end_time=Booking.compute_end_time(start_time, fields.get('duration_minutes')),
+            **fields
+        )
+
+    def post_booking(self, start_time, **data):
+        return self.client.post('/api/bookings/bookings/', {
+            'student_id': self.student.pk,
+            'tutor_id': self.tutor.pk,
+            'topic': 'Exam prep',
+            'start_time': start_time.isoformat(),
+            **data
+        }, format='json')
+
+
+class ConflictDetectionTests(BookingAPITestCase):
+
+    def test_overlapping_booking_is_rejected(self):
+        self.book(self.at(0))
+        response = self.post_booking(self.at(30))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_omitted_end_time_is_computed_before_the_check(self):
+        # Without an end time the new session still covers 60 minutes
+        self.book(self.at(45), duration_minutes=30)
+        self.assertEqual(self.post_booking(self.at(0)).status_code, 400)
+
+    def test_adjacent_and_inactive_bookings_do_not_conflict(self):
+        self.book(self.at(0))
+        self.book(self.at(60), status='cancelled')
+        response = self.post_booking(self.at(60))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.get(pk=response.data['id']).end_time, self.at(120))
+
+    def test_find_conflicts_checks_many_intervals_in_one_query(self):
+        booking = self.book(self.at(60))
+        intervals = [
+            (self.at(0), self.at(60)),
+            (self.at(30), self.at(90)),
+            (self.at(100), self.at(110)),
+            (self.at(120), self.at(180)),
+        ]
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(self.tutor, intervals)
+        self.assertEqual(conflicts, [[], [booking.pk], [booking.pk], []])
+        self.assertEqual(find_conflicts(self.tutor, intervals, exclude_ids=[booking.pk]), [[]] * 4)
+
+    def test_check_availability(self):
+        self.book(self.at(0))
+        response = self.client.post('/api/bookings/bookings/check_availability/', {
+            'tutor_id': self.tutor.pk,
+            'intervals': [
+                {'start_time': self.at(30).isoformat()},
+                {'start_time': self.at(60).isoformat(), 'duration_minutes': 30},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['available'] for result in response.data['results']], [False, True])
+
+
+class KeysetPaginationTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bookings = [self.book(self.at(120 * i)) for i in range(5)]
+
+    def list_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [booking['id'] for booking in response.data['results']], response.data
+
+    def test_pages_follow_created_at_then_id_descending(self):
+        # Ties on created_at are broken by id
+        Booking.objects.filter(pk__in=[b.pk for b in self.bookings[1:4]]).update(
+            created_at=self.bookings[1].created_at
+        )
+        expected = [b.pk for b in reversed(self.bookings)]
+
+        ids, data = self.list_ids('/api/bookings/bookings/?page_size=2')
+        self.assertIsNone(data['previous'])
+        while data['next']:
+            page, data = self.list_ids(data['next'])
+            self.assertLessEqual(len(page), 2)
+            ids += page
+        self.assertEqual(ids, expected)
+
+    def test_new_bookings_do_not_shift_later_pages(self):
+        first, data = self.list_ids('/api/bookings/bookings/?page_size=2')
+        new = self.book(self.at(1000))
+        Booking.objects.filter(pk=self.bookings[4].pk).delete()
+
+        second, data = self.list_ids(data['next'])
+        self.assertEqual(second, [self.bookings[2].pk, self.bookings[1].pk])
+
+        previous, _ = self.list_ids(data['previous'])
+        self.assertEqual(previous, [new.pk, self.bookings[3].pk])
+
+    def test_filters_apply_before_paging(self):
+        Booking.objects.filter(pk=self.bookings[3].pk).update(status='confirmed')
+        ids, data = self.list_ids('/api/bookings/bookings/?status=pending&page_size=3')
+        self.assertEqual(ids, [self.bookings[4].pk, self.bookings[2].pk, self.bookings[1].pk])
+        ids, _ = self.list_ids(data['next'])
+        self.assertEqual(ids, [self.bookings[0].pk])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/bookings/bookings/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkBookingTests(BookingAPITestCase):
+
+    def post_bulk(self, **data):
+        return self.client.post('/api/bookings/bookings/bulk/', {
+            'tutor_id': self.tutor.pk,
+            'topic': 'Weekly tutoring',
+            **data
+        }, format='json')
+
+    def weekly(self, count, **data):
+        return self.post_bulk(recurrence={'start_time': self.start.isoformat(), 'count': count}, **data)
+
+    def test_recurrence_books_a_term_in_constant_queries(self):
+        # The first reservation also creates the tutor's lock row
+        self.assertEqual(self.weekly(1).status_code, 201)
+        Booking.objects.all().delete()
+        with CaptureQueriesContext(connection) as short:
+            self.assertEqual(self.weekly(2).status_code, 201)
+        Booking.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as term:
+            response = self.weekly(15)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 15)
+        self.assertEqual(len(term), len(short))
+
+        starts = list(Booking.objects.order_by('start_time').values_list('start_time', flat=True))
+        self.assertEqual(starts, [self.start + timezone.timedelta(weeks=i) for i in range(15)])
+
+    def test_conflicts_are_reported_per_session(self):
+        self.book(self.start + timezone.timedelta(weeks=1))
+        response = self.weekly(3)
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['created'] for result in response.data['results']], [True, False, True])
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_all_or_nothing_creates_nothing_on_conflict(self):
+        self.book(self.start + timezone.timedelta(weeks=1))
+        response = self.weekly(3, all_or_nothing=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_sessions_overlapping_each_other_are_rejected(self):
+        response = self.post_bulk(sessions=[
+            {'start_time': self.at(0).isoformat()},
+            {'start_time': self.at(30).isoformat()},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['results'][1]['error'], 'Overlaps another session in this request.')
+
+
+class TutorSubjectTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calculus = Subject.objects.create(name='Calculus', code='MATH101')
+        self.physics = Subject.objects.create(name='Physics', code='PHYS101')
+        TutorSubject.objects.create(tutor=self.tutor, subject=self.calculus)
+
+    def test_tutor_filter(self):
+        response = self.client.get(f'/api/bookings/tutor-subjects/?tutor={self.tutor.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['subject']['name'] for item in response.data], ['Calculus'])
+
+        response = self.client.get('/api/bookings/tutor-subjects/')
+        self.assertEqual(response.data, [])
+
+    def test_non_integer_tutor_filter_is_rejected(self):
+        response = self.client.get('/api/bookings/tutor-subjects/?tutor=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tutor', response.data)
+
+    def test_discover_by_subject(self):
+        other = make_user('other@example.com', tutor=True)
+        TutorSubject.objects.create(tutor=other, subject=self.physics)
+        response = self.client.get(f'/api/bookings/tutors/discover/?subject={self.calculus.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tutor['id'] for tutor in response.data['results']], [self.tutor.pk])
+
+
+class TutorStatsTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tutor_client = APIClient()
+        self.tutor_client.force_authenticate(self.tutor)
+
+    def stats(self):
+        return TutorStats.objects.values(
+            'rating_sum', 'rating_count', 'average_rating', 'completed_count',
+            'cancelled_count', 'minutes_taught', 'earnings'
+        ).get(tutor=self.tutor)
+
+    def assertStatsMatchRebuild(self):
+        stats = self.stats()
+        rebuild_tutor_stats(tutor_ids=[self.tutor.pk])
+        self.assertEqual(stats, self.stats())
+
+    def complete(self, booking):
+        response = self.tutor_client.post(
+            f'/api/bookings/bookings/{booking.pk}/update_status/', {'status': 'completed'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def rate(self, booking, rating):
+        response = self.client.post(
+            f'/api/bookings/bookings/{booking.pk}/submit_feedback/', {'rating': rating}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_status_and_rating_deltas(self):
+        first = self.book(self.at(0), hourly_rate=30)
+        second = self.book(self.at(120), duration_minutes=90, hourly_rate=20)
+        self.complete(first)
+        self.complete(second)
+        self.rate(first, 5)
+        self.rate(second, 2)
+        self.rate(second, 4)
+
+        stats = self.stats()
+        self.assertEqual(stats['completed_count'], 2)
+        self.assertEqual(stats['minutes_taught'], 150)
+        self.assertEqual(stats['earnings'], 60)
+        self.assertEqual((stats['rating_sum'], stats['rating_count']), (9, 2))
+        self.assertEqual(stats['average_rating'], 4.5)
+        self.assertStatsMatchRebuild()
+
+    def test_cancellation_and_deletion_deltas(self):
+        cancelled = self.book(self.at(0))
+        completed = self.book(self.at(120))
+        response = self.client.post(
+            f'/api/bookings/bookings/{cancelled.pk}/update_status/', {'status': 'cancelled'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.complete(completed)
+        self.rate(completed, 3)
+        self.assertEqual(self.stats()['cancelled_count'], 1)
+
+        self.assertEqual(self.client.delete(f'/api/bookings/bookings/{completed.pk}/').status_code, 204)
+        stats = self.stats()
+        self.assertEqual((stats['completed_count'], stats['minutes_taught'], stats['rating_count']), (0, 0, 0))
+        self.assertEqual(stats['average_rating'], 0)
+        self.assertStatsMatchRebuild()
+
+    def test_rating_is_read_only_outside_feedback(self):
+        booking = self.book(self.at(0))
+        self.complete(booking)
+        response = self.client.patch(
+            f'/api/bookings/bookings/{booking.pk}/', {'student_rating': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        booking.refresh_from_db()
+        self.assertIsNone(booking.student_rating)
+        self.assertEqual(self.stats()['rating_count'], 0)
+
+    def test_duration_edit_of_a_completed_booking(self):
+        booking = self.book(self.at(0))
+        self.complete(booking)
+        response = self.client.patch(
+            f'/api/bookings/bookings/{booking.pk}/', {'duration_minutes': 90}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stats()['minutes_taught'], 90)
+        self.assertStatsMatchRebuild()
+
+
+class ListingCacheTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        django_cache.clear()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'], response.data
+
+    def test_subject_changes_invalidate_the_subject_listing(self):
+        self.assertEqual(self.get('/api/bookings/subjects/')[0], 'MISS')
+        self.assertEqual(self.get('/api/bookings/subjects/'), ('HIT', []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subject = Subject.objects.create(name='Calculus')
+        outcome, data = self.get('/api/bookings/subjects/')
+        self.assertEqual((outcome, [item['name'] for item in data]), ('MISS', ['Calculus']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subject.delete()
+        self.assertEqual(self.get('/api/bookings/subjects/'), ('MISS', []))
+
+    def test_listings_are_invalidated_on_commit(self):
+        self.get('/api/bookings/subjects/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='Calculus')
+            # A listing rebuilt before the commit is not kept past it
+            self.assertEqual(self.get('/api/bookings/subjects/')[0], 'HIT')
+        self.assertEqual(self.get('/api/bookings/subjects/')[0], 'MISS')
+
+    def test_tutor_changes_invalidate_the_tutor_listing(self):
+        self.assertEqual(self.get('/api/bookings/tutors/')[0], 'MISS')
+
+        # Users who are not approved tutors never show up in the listing
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.first_name = 'Renamed'
+            self.student.save()
+            make_user('applicant@example.com')
+        self.assertEqual(self.get('/api/bookings/tutors/')[0], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutor.first_name = 'Ada'
+            self.tutor.save()
+        outcome, data = self.get('/api/bookings/tutors/')
+        self.assertEqual((outcome, data[0]['name']), ('MISS', 'Ada '))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutor.profile.tutor_approved = False
+            self.tutor.profile.save()
+        self.assertEqual(self.get('/api/bookings/tutors/'), ('MISS', []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutor.save(update_fields=['last_login'])
+        self.assertEqual(self.get('/api/bookings/tutors/')[0], 'HIT')
+
+    def test_deleting_a_tutor_invalidates_the_tutor_listing(self):
+        self.assertEqual(len(self.get('/api/bookings/tutors/')[1]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.delete()
+        self.assertEqual(self.get('/api/bookings/tutors/')[0], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutor.delete()
+        self.assertEqual(self.get('/api/bookings/tutors/'), ('MISS', []))
+
+
+class ConditionalGetTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.booking = self.book(self.at(0))
+        self.url = f'/api/bookings/bookings/{self.booking.pk}/'
+
+    def test_detail_revalidates_until_the_booking_changes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+        self.booking.topic = 'Changed'
+        self.booking.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['topic'], 'Changed')
+
+    def test_list_etag_changes_when_a_booking_is_removed(self):
+        self.book(self.at(120))
+        etag = self.client.get('/api/bookings/bookings/')['ETag']
+        self.assertEqual(self.client.get('/api/bookings/bookings/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # The latest updated_at stays the same, only the count changes
+        Booking.objects.filter(pk=self.booking.pk).delete()
+        self.assertEqual(self.client.get('/api/bookings/bookings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_invisible_and_malformed_ids_are_not_found(self):
+        self.client.force_authenticate(make_user('stranger@example.com'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get('/api/bookings/bookings/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/bookings/bookings/abc/').status_code, 404)
+
+
+@mock.patch.object(BookingViewSet, 'CHANGES_SETTLE_SECONDS', 0)
+class ChangesFeedTests(BookingAPITestCase):
+
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get('/api/bookings/bookings/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_updates_since_the_sync_token(self):
+        first, second = self.book(self.at(0)), self.book(self.at(120))
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['results']], [first.pk, second.pk])
+        self.assertEqual(self.sync(data['sync_token'])['results'], [])
+
+        first.topic = 'Changed'
+        first.save()
+        changes = self.sync(data['sync_token'])
+        self.assertEqual([row['topic'] for row in changes['results']], ['Changed'])
+        self.assertEqual(changes['removed'], [])
+
+    def test_deleted_and_archived_bookings_are_reported_as_removed(self):
+        deleted, archived, kept = self.book(self.at(0)), self.book(self.at(120)), self.book(self.at(240))
+        token = self.sync()['sync_token']
+
+        self.assertEqual(self.client.delete(f'/api/bookings/bookings/{deleted.pk}/').status_code, 204)
+        Booking.objects.filter(pk=archived.pk).update(
+            status='completed',
+            start_time=self.at(-60 * 24 * 30),
+            end_time=self.at(-60 * 24 * 30 + 60)
+        )
+        self.assertEqual(archive_bookings(cutoff=timezone.now()), 1)
+
+        changes = self.sync(token)
+        self.assertEqual(
+            [(row['id'], row['reason']) for row in changes['removed']],
+            [(deleted.pk, 'deleted'), (archived.pk, 'archived')]
+        )
+        self.assertEqual(changes['results'], [])
+        self.assertEqual(self.sync(changes['sync_token'])['removed'], [])
+        self.assertTrue(Booking.objects.filter(pk=kept.pk).exists())
+
+    def test_pages_merge_updates_and_removals_in_order(self):
+        bookings = [self.book(self.at(120 * i)) for i in range(3)]
+        token = self.sync()['sync_token']
+        self.client.delete(f'/api/bookings/bookings/{bookings[0].pk}/')
+        bookings[1].save()
+        self.client.delete(f'/api/bookings/bookings/{bookings[2].pk}/')
+
+        seen = []
+        while True:
+            data = self.sync(token, limit=1)
+            seen += [('updated', row['id']) for row in data['results']]
+            seen += [('removed', row['id']) for row in data['removed']]
+            token = data['sync_token']
+            if not data['has_more']:
+                break
+        self.assertEqual(seen, [
+            ('removed', bookings[0].pk), ('updated', bookings[1].pk), ('removed', bookings[2].pk)
+        ])
+
+    def test_removals_of_other_users_bookings_are_hidden(self):
+        stranger = make_user('stranger@example.com')
+        BookingTombstone.objects.create(
+            booking_id=1000, student=stranger, tutor=self.tutor, reason='deleted'
+        )
+        self.assertEqual(self.sync()['removed'], [])
+
+    def test_invalid_sync_token(self):
+        response = self.client.get('/api/bookings/bookings/changes/', {'since': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(make_user('admin@example.com', staff=True))
+        self.bookings = [self.book(self.at(120 * i), hourly_rate=30) for i in range(3)]
+        Booking.objects.filter(pk=self.bookings[1].pk).update(status='completed')
+
+    def export(self, **params):
+        response = self.client.get('/api/bookings/bookings/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(self.export().splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], [b.pk for b in self.bookings])
+        self.assertEqual(rows[0]['tutor_email'], 'tutor@example.com')
+        self.assertEqual(rows[0]['total_amount'], '30.00')
+
+    def test_ndjson_with_status_filter(self):
+        lines = self.export(file_format='ndjson', status='completed,cancelled').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.bookings[1].pk])
+
+    def test_unknown_status_is_rejected(self):
+        response = self.client.get('/api/bookings/bookings/export/', {'status': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get('/api/bookings/bookings/export/').status_code, 403)
+
+    def test_rows_are_read_in_id_chunks(self):
+        chunks = list(iter_chunks(Booking.objects.all(), chunk_size=2))
+        self.assertEqual([[row[0] for row in chunk] for chunk in chunks], [
+            [self.bookings[0].pk, self.bookings[1].pk], [self.bookings[2].pk]
+        ])
+
+    def archive_first(self):
+        """Move the first booking into the archive"""
+        Booking.objects.filter(pk=self.bookings[0].pk).update(
+            status='completed', start_time=self.at(-60 * 24 * 400), end_time=self.at(-60 * 24 * 400 + 60)
+        )
+        self.assertEqual(archive_bookings(cutoff=timezone.now()), 1)
+
+    def test_archived_bookings_are_exported(self):
+        self.archive_first()
+        rows = list(csv.DictReader(self.export().splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], [b.pk for b in self.bookings])
+        self.assertEqual((rows[0]['status'], rows[0]['tutor_email']), ('completed', 'tutor@example.com'))
+
+        lines = self.export(file_format='ndjson', status='completed').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.bookings[0].pk, self.bookings[1].pk])
+
+    def test_archive_chunks_merge_on_id(self):
+        self.archive_first()
+        chunks = list(iter_chunks(Booking.objects.all(), ArchivedBooking.objects.all(), chunk_size=2))
+        self.assertEqual([[row[0] for row in chunk] for chunk in chunks], [
+            [self.bookings[0].pk, self.bookings[1].pk], [self.bookings[2].pk]
+        ])
+
+
+class FlatListTests(BookingAPITestCase):
+
+    def test_list_matches_booking_serializer(self):
+        subject = Subject.objects.create(name='Calculus', code='MATH101')
+        self.book(self.at(0), subject=subject, hourly_rate=Decimal('12.5'), student_rating=4)
+        self.book(self.at(120))
+        # A user without a profile has no academic_year
+        self.tutor.profile.delete()
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/bookings/bookings/')
+        expected = BookingSerializer(
+            Booking.objects.order_by('-created_at', '-id'), many=True
+        ).data
+        self.assertEqual(response.json()['results'], json.loads(json.dumps(expected)))
+
+
+class SparseFieldsetTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.booking = self.book(self.at(0), subject=Subject.objects.create(name='Calculus'))
+
+    def test_fields_select_nested_sub_fields(self):
+        response = self.client.get('/api/bookings/bookings/', {'fields': 'id,tutor.email'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.booking.pk, 'tutor': {'email': 'tutor@example.com'}}]
+        )
+
+    def test_unexpanded_relations_render_as_ids(self):
+        response = self.client.get(
+            f'/api/bookings/bookings/{self.booking.pk}/',
+            {'fields': 'student,tutor,subject', 'expand': 'subject'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['student'], self.student.pk)
+        self.assertEqual(response.data['tutor'], self.tutor.pk)
+        self.assertEqual(response.data['subject']['name'], 'Calculus')
+
+    def test_detail_only_loads_requested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/bookings/bookings/{self.booking.pk}/', {'fields': 'id,topic'})
+        self.assertEqual(response.data, {'id': self.booking.pk, 'topic': 'Exam prep'})
+        self.assertNotIn('description', queries[-1]['sql'])
+        self.assertNotIn('JOIN', queries[-1]['sql'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/bookings/bookings/', {'fields': 'id,bogus'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/bookings/bookings/', {'expand': 'topic'})
+        self.assertEqual(response.status_code, 400)
+
+
+class LifecycleSweepTests(BookingAPITestCase):
+
+    def test_sweep_moves_stale_bookings_in_chunks(self):
+        pending = [self.book(self.at(120 * i)) for i in range(3)]
+        confirmed = self.book(self.at(600), status='confirmed')
+        started = self.book(self.at(720), status='confirmed')
+        upcoming = self.book(self.at(60 * 24))
+        entry = WaitlistEntry.objects.create(
+            student=self.student, tutor=self.tutor, topic='Exam prep',
+            start_time=self.at(0), end_time=self.at(60)
+        )
+
+        # Just after `started` began and the confirmed session before it ended
+        counts = sweep_bookings(now=self.at(730), chunk_size=2)
+        self.assertEqual(counts, {'expired': 3, 'awaiting_completion': 1, 'waitlist_expired': 1})
+
+        statuses = dict(Booking.objects.values_list('id', 'status'))
+        self.assertEqual([statuses[b.pk] for b in pending], ['expired'] * 3)
+        self.assertEqual(statuses[confirmed.pk], 'awaiting_completion')
+        self.assertEqual(statuses[started.pk], 'confirmed')
+        self.assertEqual(statuses[upcoming.pk], 'pending')
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'expired')
+
+        # Swept bookings show up in the changes feed
+        booking = Booking.objects.get(pk=confirmed.pk)
+        self.assertGreater(booking.updated_at, confirmed.updated_at)
+        self.assertEqual(sweep_bookings(now=self.at(730)), {
+            'expired': 0, 'awaiting_completion': 0, 'waitlist_expired': 0
+        })
+
+
+class ReminderSchedulerTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Close enough for the first tick to run at the real time, so the
+        # scheduler sees changes made after it started
+        self.start = timezone.now() + timezone.timedelta(hours=2)
+        self.scheduler = ReminderScheduler(lead=timezone.timedelta(hours=1))
+        self.booking = self.book(self.at(0), status='confirmed')
+
+    def reminders(self):
+        return sorted(
+            EmailOutbox.objects.filter(dedup_key__startswith='reminder:')
+            .values_list('recipient', flat=True)
+        )
+
+    def test_reminds_both_parties_once_when_due(self):
+        self.assertEqual(self.scheduler.tick(now=self.at(-61)), 0)
+        self.assertEqual(self.scheduler.tick(now=self.at(-59)), 1)
+        self.assertEqual(self.reminders(), ['student@example.com', 'tutor@example.com'])
+        self.assertEqual(self.scheduler.tick(now=self.at(-58)), 0)
+
+        # A restarted scheduler does not remind again
+        self.assertEqual(ReminderScheduler(lead=timezone.timedelta(hours=1)).tick(now=self.at(-57)), 0)
+        self.assertEqual(len(self.reminders()), 2)
+
+    def test_rescheduled_and_cancelled_sessions(self):
+        cancelled = self.book(self.at(120), status='confirmed')
+        self.scheduler.tick(now=timezone.now())
+
+        self.booking.start_time = self.at(180)
+        self.booking.end_time = self.at(240)
+        self.booking.save()
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        self.assertEqual(self.scheduler.tick(now=self.at(-59)), 0)
+        self.assertEqual(self.scheduler.tick(now=self.at(61)), 0)
+        self.assertEqual(self.scheduler.tick(now=self.at(121)), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.reminder_sent_for, self.at(180))
+
+
+class ArchiveTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        past = self.start - timezone.timedelta(days=60)
+        self.old = [
+            self.book(past + timezone.timedelta(hours=2 * i), status='completed') for i in range(3)
+        ]
+        self.active = self.book(past + timezone.timedelta(hours=8))
+        self.recent = self.book(timezone.now() - timezone.timedelta(hours=3), status='completed')
+        self.cutoff = timezone.now() - timezone.timedelta(days=7)
+
+    def test_archives_finished_bookings_before_the_cutoff(self):
+        self.assertEqual(archive_bookings(cutoff=self.cutoff, chunk_size=2), 3)
+        self.assertEqual(
+            sorted(ArchivedBooking.objects.values_list('id', flat=True)), [b.pk for b in self.old]
+        )
+        self.assertEqual(
+            sorted(Booking.objects.values_list('id', flat=True)), [self.active.pk, self.recent.pk]
+        )
+        self.assertEqual(ArchivedBooking.objects.get(pk=self.old[0].pk).topic, 'Exam prep')
+
+    def test_past_lists_include_the_archive_on_request(self):
+        archive_bookings(cutoff=self.cutoff)
+
+        response = self.client.get('/api/bookings/bookings/', {'timeframe': 'past'})
+        self.assertEqual(
+            [row['id'] for row in response.data['results']], [self.recent.pk, self.active.pk]
+        )
+
+        ids = []
+        url = '/api/bookings/bookings/?timeframe=past&include_archived=true&page_size=2'
+        while url:
+            response = self.client.get(url)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, [self.recent.pk, self.active.pk] + [b.pk for b in reversed(self.old)])
+
+    def test_archived_bookings_still_count_in_rebuilt_stats(self):
+        archive_bookings(cutoff=self.cutoff)
+        rebuild_tutor_stats()
+        self.assertEqual(TutorStats.objects.get(tutor=self.tutor).completed_count, 4)
+
+
+class SubjectAutocompleteTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics = Subject.objects.create(name='Physics', code='PHY101')
+            self.applied = Subject.objects.create(name='Applied Physics', code='APH200')
+            self.philosophy = Subject.objects.create(name='Philosophy', code='PHL110')
+
+    def names(self, q, **params):
+        response = self.client.get('/api/bookings/subjects/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [subject['name'] for subject in response.data['results']]
+
+    def test_name_prefixes_rank_before_codes_and_words(self):
+        self.assertEqual(self.names('ph'), ['Philosophy', 'Physics', 'Applied Physics'])
+        self.assertEqual(self.names('aph'), ['Applied Physics'])
+        self.assertEqual(self.names('PHYS'), ['Physics', 'Applied Physics'])
+        self.assertEqual(self.names('phys', words='false'), ['Physics'])
+        self.assertEqual(self.names('ph', limit=1), ['Philosophy'])
+        self.assertEqual(self.names('  '), [])
+
+    def test_index_follows_subject_changes(self):
+        self.assertEqual(self.names('chem'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            chemistry = Subject.objects.create(name='Chemistry')
+        self.assertEqual(self.names('chem'), ['Chemistry'])
+        with self.captureOnCommitCallbacks(execute=True):
+            chemistry.name = 'Biochemistry'
+            chemistry.save()
+        self.assertEqual(self.names('chem'), [])
+        self.assertEqual(self.names('bio'), ['Biochemistry'])
+        with self.captureOnCommitCallbacks(execute=True):
+            chemistry.delete()
+        self.assertEqual(self.names('bio'), [])
+
+    def test_index_is_rebuilt_only_after_the_change_commits(self):
+        self.assertEqual(self.names('chem'), [])
+        version = cache.get_version(cache.SUBJECTS)
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='Chemistry')
+            # A lookup before the commit neither rebuilds the index nor
+            # pins the version the commit will bump
+            self.assertEqual(cache.get_version(cache.SUBJECTS), version)
+            self.assertEqual(self.names('chem'), [])
+        self.assertNotEqual(cache.get_version(cache.SUBJECTS), version)
+        self.assertEqual(self.names('chem'), ['Chemistry'])
+
+    def test_lookups_do_not_query_the_database(self):
+        get_subject_index()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_subject_index().search('ph', 10)), 3)
+
+
+class SubtractIntervalsTests(TestCase):
+
+    def setUp(self):
+        self.start = timezone.now().replace(microsecond=0)
+        self.hour = timezone.timedelta(hours=1)
+
+    def at(self, hours):
+        return self.start + hours * self.hour
+
+    def gaps(self, busy, duration=1, window=(0, 8)):
+        free = subtract_intervals(
+            self.at(window[0]), self.at(window[1]),
+            [(self.at(start), self.at(end)) for start, end in busy],
+            duration * self.hour
+        )
+        return [((start - self.start) / self.hour, (end - self.start) / self.hour) for start, end in free]
+
+    def test_empty_window_is_one_gap(self):
+        self.assertEqual(self.gaps([]), [(0, 8)])
+
+    def test_overlapping_busy_intervals_merge(self):
+        self.assertEqual(self.gaps([(1, 3), (2, 4), (2.5, 3)]), [(0, 1), (4, 8)])
+
+    def test_busy_intervals_past_the_window_edges(self):
+        self.assertEqual(self.gaps([(-2, 1), (7, 10)]), [(1, 7)])
+        self.assertEqual(self.gaps([(-1, 9)]), [])
+
+    def test_gaps_shorter_than_duration_are_skipped(self):
+        self.assertEqual(self.gaps([(1, 2), (2.5, 4), (5, 6)], duration=1), [(0, 1), (4, 5), (6, 8)])
+        self.assertEqual(self.gaps([(1, 2), (2.5, 4), (5, 6)], duration=1.5), [(6, 8)])
+
+    def test_final_gap_runs_to_the_window_end(self):
+        self.assertEqual(self.gaps([(0, 6.5)]), [(6.5, 8)])
+        self.assertEqual(self.gaps([(0, 7.5)]), [])
+
+
+class FreeSlotSearchTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tutors = [self.tutor] + [make_user(f'tutor{i}@example.com', tutor=True) for i in range(5)]
+        self.subject = Subject.objects.create(name='Calculus')
+
+    def search(self, **params):
+        return self.client.get('/api/bookings/tutors/free_slots/', {
+            'start': self.at(0).isoformat(),
+            'end': self.at(240).isoformat(),
+            **params
+        })
+
+    def fill(self, tutor):
+        """Book a tutor for the whole search window"""
+        for block in range(2):
+            self.book(self.at(120 * block), tutor=tutor, duration_minutes=120)
+
+    def test_returns_the_free_slots_of_each_tutor(self):
+        self.book(self.at(60), tutor=self.tutor, duration_minutes=60)
+        response = self.search(limit=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.tutor.pk)
+        self.assertEqual(
+            [(slot['start_time'], slot['end_time']) for slot in response.data[0]['free_slots']],
+            [(self.at(0), self.at(60)), (self.at(120), self.at(240))]
+        )
+
+    def test_filters_by_subject(self):
+        TutorSubject.objects.create(tutor=self.tutors[2], subject=self.subject)
+        TutorSubject.objects.create(tutor=self.tutors[4], subject=self.subject)
+        response = self.search(subject=self.subject.pk)
+        self.assertEqual([tutor['id'] for tutor in response.data], [self.tutors[2].pk, self.tutors[4].pk])
+
+    def test_limit_stops_the_walk_across_batches(self):
+        self.fill(self.tutors[0])
+        self.fill(self.tutors[2])
+        with mock.patch('bookings.views.find_free_slots', functools.partial(find_free_slots, batch_size=2)):
+            response = self.search(limit=3)
+        self.assertEqual(
+            [tutor['id'] for tutor in response.data], [self.tutors[1].pk, self.tutors[3].pk, self.tutors[4].pk]
+        )
+
+    def test_rejects_bad_windows(self):
+        self.assertEqual(self.search(end=self.at(-60).isoformat()).status_code, 400)
+        self.assertEqual(self.search(end=self.at(60 * 24 * 40).isoformat()).status_code, 400)
+
+    def test_queries_are_per_batch_not_per_tutor(self):
+        for tutor in self.tutors:
+            self.fill(tutor)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.search().data, [])
+            return len(queries)
+
+        few = count_queries()
+        for i in range(10):
+            self.fill(make_user(f'busy{i}@example.com', tutor=True))
+        # Tutor rows and their bookings: two queries for the one batch
+        self.assertEqual(count_queries(), few)
+        with mock.patch('bookings.views.find_free_slots', functools.partial(find_free_slots, batch_size=4)):
+            # 16 tutors in four full batches, then an empty read
+            self.assertEqual(count_queries(), few - 2 + 4 * 2 + 1)
+
+
+class WaitlistTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.taken = self.book(self.at(0), student=make_user('first@example.com'))
+        self.others = [make_user(f'waiting{i}@example.com') for i in range(2)]
+
+    def join(self, start_time, student=None, **data):
+        if student is not None:
+            self.client.force_authenticate(student)
+        return self.client.post('/api/bookings/waitlist/', {
+            'tutor_id': self.tutor.pk,
+            'topic': 'Exam prep',
+            'start_time': start_time.isoformat(),
+            **data
+        }, format='json')
+
+    def test_free_slots_are_booked_straight_away(self):
+        response = self.join(self.at(120))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'promoted')
+        booking = Booking.objects.get(pk=response.data['booking_id'])
+        self.assertEqual((booking.student, booking.status), (self.student, 'pending'))
+
+    def test_taken_slots_are_queued_in_arrival_order(self):
+        self.assertEqual(self.join(self.at(0)).data['position'], 1)
+        self.assertEqual(self.join(self.at(30), student=self.others[0]).data['position'], 2)
+
+    def test_rejects_joining_the_same_slot_twice(self):
+        self.assertEqual(self.join(self.at(0)).status_code, 201)
+        response = self.join(self.at(0))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+    def test_a_concurrent_duplicate_is_a_validation_error(self):
+        self.join(self.at(0))
+        # As if both requests passed validate() before either was saved
+        serializer = WaitlistEntrySerializer()
+        with self.assertRaises(serializers.ValidationError):
+            serializer.create({
+                'student': self.student,
+                'tutor': self.tutor,
+                'topic': 'Exam prep',
+                'start_time': self.at(0),
+                'end_time': self.at(60),
+            })
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+    def test_cancellation_promotes_the_first_entry_that_fits(self):
+        first = self.join(self.at(0)).data['id']
+        second = self.join(self.at(30), student=self.others[0]).data['id']
+        later = self.join(self.at(-30), student=self.others[1]).data['id']
+
+        self.client.force_authenticate(self.taken.student)
+        response = self.client.post(
+            f'/api/bookings/bookings/{self.taken.pk}/update_status/', {'status': 'cancelled'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        entries = WaitlistEntry.objects.in_bulk([first, second, later])
+        self.assertEqual(
+            [entries[pk].status for pk in (first, second, later)], ['promoted', 'waiting', 'waiting']
+        )
+        booking = entries[first].booking
+        self.assertEqual(
+            (booking.student, booking.start_time, booking.status), (self.student, self.at(0), 'pending')
+        )
+        self.assertEqual(
+            sorted(
+                EmailOutbox.objects.filter(dedup_key__startswith='waitlist-')
+                .values_list('recipient', flat=True)
+            ),
+            ['student@example.com', 'waiting0@example.com', 'waiting1@example.com']
+        )
+
+    def test_deleting_a_booking_promotes_the_waitlist(self):
+        entry = self.join(self.at(0)).data['id']
+        self.client.force_authenticate(self.taken.student)
+        self.assertEqual(self.client.delete(f'/api/bookings/bookings/{self.taken.pk}/').status_code, 204)
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry).status, 'promoted')
+
+    def test_withdrawn_entries_are_not_promoted(self):
+        entry = self.join(self.at(0)).data['id']
+        self.assertEqual(self.client.post(f'/api/bookings/waitlist/{entry}/withdraw/').status_code, 200)
+        self.assertEqual(self.client.post(f'/api/bookings/waitlist/{entry}/withdraw/').status_code, 400)
+
+        self.client.force_authenticate(self.taken.student)
+        self.client.post(f'/api/bookings/bookings/{self.taken.pk}/update_status/', {'status': 'cancelled'})
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry).status, 'withdrawn')
+
+
+class SearchTests(BookingAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = make_user('other@example.com')
+
+    def search(self, text):
+        response = self.client.get('/api/bookings/bookings/search/', {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_topic_matches_rank_above_description_matches(self):
+        in_description = self.book(self.at(0), topic='Revision', description='Integrals and limits')
+        in_topic = self.book(self.at(-120), topic='Integrals')
+        self.book(self.at(120), topic='Mechanics')
+        self.assertEqual(self.search('integral'), [in_topic.pk, in_description.pk])
+
+    def test_finds_older_strong_matches_behind_many_newer_ones(self):
+        old = self.book(self.at(0), topic='Thermodynamics', description='thermodynamics')
+        newer = [
+            self.book(self.at(60 * (i + 1)), topic='Revision', description='thermodynamics')
+            for i in range(4)
+        ]
+        with mock.patch.object(search, 'RANK_WINDOW', 2):
+            self.assertEqual(self.search('thermodynamics'), [old.pk] + [b.pk for b in reversed(newer)])
+            # Staff rank only the most recent matches
+            staff = search.search_bookings(Booking.objects.all(), 'thermodynamics', 10)
+            self.assertEqual(staff, [b.pk for b in reversed(newer[-2:])])
+
+    def test_only_searches_the_users_own_bookings(self):
+        own = self.book(self.at(0), topic='Optics')
+        self.book(self.at(60), topic='Optics', student=self.other)
+        self.assertEqual(self.search('optics'), [own.pk])
+
+    def test_owner_tokens_are_not_searchable(self):
+        self.book(self.at(0))
+        self.assertEqual(self.search(f'u{self.student.pk}'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        booking = self.book(self.at(0), topic='Optics')
+        booking.topic = 'Acoustics'
+        booking.save()
+        self.assertEqual(self.search('optics'), [])
+        self.assertEqual(self.search('acoustics'), [booking.pk])
+
+        booking.student = self.other
+        booking.save()
+        self.assertEqual(self.search('acoustics'), [])
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.search('acoustics'), [booking.pk])
+        booking.delete()
+        self.assertEqual(self.search('acoustics'), [])
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """
+    Stress test: parallel writers competing for the same tutor's slots.
+
+    Throughput under the same contention is measured by the
+    bench_reservations command.
+    """
+    WRITERS = 50
+    SLOTS = 10
+
+    def setUp(self):
+        self.tutor = User.objects.create_user(username='tutor@example.com', email='tutor@example.com')
+        self.tutor.profile.is_tutor = True
+        self.tutor.profile.tutor_approved = True
+        self.tutor.profile.save()
+        self.students = [
+            User.objects.create_user(username=f'student{i}@example.com', email=f'student{i}@example.com')
+            for i in range(self.WRITERS)
+        ]
+        self.start = (timezone.now() + timezone.timedelta(days=7)).replace(microsecond=0)
+
+    def post_booking(self, student, start_time, barrier, statuses):
+        client = APIClient()
+        client.force_authenticate(student)
+        barrier.wait()
+        try:
+            response = client.post('/api/bookings/bookings/', {
+                'student_id': student.pk,
+                'tutor_id': self.tutor.pk,
+                'topic': 'Exam prep',
+                'start_time': start_time.isoformat(),
+                'duration_minutes': 60,
+            }, format='json')
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_writers_never_double_book(self):
+        # Slots start every 30 minutes and last an hour, so neighbours overlap
+        # too: at most every other slot can be taken
+        slots = [self.start + timezone.timedelta(minutes=30 * i) for i in range(self.SLOTS)]
+        barrier = threading.Barrier(self.WRITERS)
+        statuses = []
+        threads = [
+            threading.Thread(
+                target=self.post_booking,
+                args=(student, slots[i % self.SLOTS], barrier, statuses)
+            )
+            for i, student in enumerate(self.students)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), self.WRITERS)
+        self.assertEqual(set(statuses) - {201, 400}, set())
+
+        bookings = list(
+            Booking.objects.filter(tutor=self.tutor).order_by('start_time')
+            .values_list('start_time', 'end_time')
+        )
+        booked, rejected = statuses.count(201), statuses.count(400)
+        self.assertEqual(len(bookings), booked)
+        self.assertEqual(booked + rejected, self.WRITERS)
+        for (_, previous_end), (next_start, _) in zip(bookings, bookings[1:]):
+            self.assertLessEqual(previous_end, next_start)
+        # Every slot was requested several times, so none was left free
+        for slot in slots:
+            slot_end = slot + timezone.timedelta(hours=1)
+            self.assertTrue(any(start < slot_end and slot < end for start, end in bookings))
@@ -1,14 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SubjectViewSet, BookingViewSet, TutorAvailabilityViewSet
+from .views import (
+    SubjectViewSet,
+    BookingViewSet,
+    TutorAvailabilityViewSet,
+    TutorSubjectViewSet,
+    ListingCacheStatsView,
+    WaitlistViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'subjects', SubjectViewSet, basename='subject')
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'tutors', TutorAvailabilityViewSet, basename='tutor')
+router.register(r'tutor-subjects', TutorSubjectViewSet, basename='tutor-subject')
+router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
 
 app_name = 'bookings'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('cache-stats/', ListingCacheStatsView.as_view(), name='cache_stats'),
 ]
\ No newline at end of file
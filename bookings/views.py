@@ -1,14 +1,52 @@
+import hashlib
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core.fieldsets import Fieldset
+from core.pagination import KeysetPagination, decode_cursor, encode_cursor, keyset_filter
 
-from .models import Booking, Subject
-from .serializers import BookingSerializer, SubjectSerializer, BookingStatusUpdateSerializer
+from .models import ArchivedBooking, Booking, BookingTombstone, Subject, TutorSubject, WaitlistEntry
+from .serializers import (
+    BookingSerializer,
+    SubjectSerializer,
+    BookingStatusUpdateSerializer,
+    BookingFeedbackSerializer,
+    AvailabilityCheckSerializer,
+    BulkBookingSerializer,
+    SlotSearchSerializer,
+    TutorSubjectSerializer,
+    TutorDiscoverySerializer,
+    BookingExportSerializer,
+    BookingSearchSerializer,
+    SubjectAutocompleteSerializer,
+    WaitlistEntrySerializer,
+)
+from .fast import FlatBookingSerializer
+from .export import CONTENT_TYPES, STREAMS, get_export_querysets
+from .search import search_bookings
+from .autocomplete import get_subject_index
+from .conflicts import is_tutor_available
+from .reservations import run_reserved
+from .slots import find_free_slots
+from .stats import record_deletion, record_rating_change, record_status_change
+from .waitlist import promote_waitlist, with_positions
 from .permissions import IsBookingOwner, IsTutorOrAdmin
+from . import cache
 
 class SubjectViewSet(viewsets.ModelViewSet):
     """ViewSet for subjects"""
@@ -20,20 +58,73 @@ class SubjectViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsTutorOrAdmin()]
         return super().get_permissions()
+    
+    def list(self, request, *args, **kwargs):
+        """Get all subjects, served from the versioned listing cache"""
+        data, hit = cache.get_listing(
+            cache.SUBJECTS,
+            lambda: list(self.get_serializer(self.get_queryset(), many=True).data)
+        )
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Subjects whose name, code or a word of the name starts with ?q="""
+        params = SubjectAutocompleteSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = get_subject_index().search(
+            params.validated_data['q'],
+            params.validated_data['limit'],
+            words=params.validated_data['words']
+        )
+        return Response({'results': results})
 
 class BookingViewSet(viewsets.ModelViewSet):
     """ViewSet for bookings"""
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
-    def get_queryset(self):
+    # Changes younger than this are held back from the changes feed so that
+    # transactions still in flight cannot commit behind a client's sync token
+    CHANGES_SETTLE_SECONDS = 2
+    CHANGES_PAGE_SIZE = 100
+    CHANGES_MAX_PAGE_SIZE = 500
+    
+    def get_permissions(self):
+        if self.action == 'export':
+            return [IsAdminUser()]
+        return super().get_permissions()
+    
+    def get_fieldset(self):
+        """The ?fields= / ?expand= selection, honoured on read-only actions"""
+        if self.action in ('list', 'retrieve', 'changes', 'search'):
+            return Fieldset.from_request(self.request)
+        return None
+    
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs.setdefault('fieldset', fieldset)
+        return super().get_serializer(*args, **kwargs)
+    
+    def get_visible_queryset(self, model=Booking):
+        """Bookings (or archived bookings) the current user is allowed to see"""
         user = self.request.user
-        queryset = Booking.objects.select_related('student', 'tutor', 'subject')
+        queryset = model.objects.select_related(
+            'student__profile', 'tutor__profile', 'subject'
+        )
         
         # Users can see their own bookings (as student or tutor)
         if not user.is_staff:
-            queryset = queryset.filter(Q(student=user) | Q(tutor=user))
+            queryset = queryset.filter(Q(student_id=user.pk) | Q(tutor_id=user.pk))
         
+        return queryset
+    
+    def apply_filters(self, queryset):
+        """Apply the ?status= and ?timeframe= filters"""
         # Filter by status if provided
         status_filter = self.request.query_params.get('status', None)
         if status_filter:
@@ -46,12 +137,308 @@ class BookingViewSet(viewsets.ModelViewSet):
         elif timeframe == 'past':
             queryset = queryset.filter(start_time__lt=timezone.now())
         
+        return queryset
+    
+    def get_queryset(self):
+        queryset = self.apply_filters(self.get_visible_queryset())
+        
+        if self.action == 'retrieve' and self.get_fieldset() is not None:
+            # Only load the columns and joins of the requested fields
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        
         return queryset.order_by('-created_at')
     
+    def get_archive_queryset(self):
+        """
+        Archived bookings matching the request, or None.
+        
+        Only lists of past bookings asking for ?include_archived=true read
+        the archive; everything else stays on the hot table.
+        """
+        params = self.request.query_params
+        if params.get('timeframe') != 'past':
+            return None
+        if params.get('include_archived', '').lower() not in ('1', 'true'):
+            return None
+        return self.apply_filters(self.get_visible_queryset(ArchivedBooking))
+    
+    def list(self, request, *args, **kwargs):
+        """List bookings, answering conditional requests without serializing"""
+        validator = self.get_queryset().order_by().aggregate(
+            last_modified=Max('updated_at'),
+            count=Count('id')
+        )
+        last_modified = validator['last_modified']
+        version = validator['count']
+        
+        archive = self.get_archive_queryset()
+        if archive is not None:
+            archived = archive.order_by().aggregate(
+                last_modified=Max('archived_at'),
+                count=Count('id')
+            )
+            if archived['last_modified'] and (
+                last_modified is None or archived['last_modified'] > last_modified
+            ):
+                last_modified = archived['last_modified']
+            version = f"{version}:{archived['count']}"
+        
+        # Only an ETag here: removing a booking from the result changes the
+        # count but not the latest updated_at, so Last-Modified would lie
+        return self.conditional_response(
+            request,
+            last_modified,
+            version,
+            self.build_list_response,
+            send_last_modified=False
+        )
+    
+    def build_list_response(self):
+        """Serialize a page of bookings from flat rows fetched in one query"""
+        serializer = FlatBookingSerializer(self.get_fieldset())
+        ordering = self.pagination_class.ordering
+        queryset = serializer.rows(self.filter_queryset(self.get_queryset()), extra=ordering)
+        
+        archive = self.get_archive_queryset()
+        if archive is not None:
+            # One page merged from the hot table and the archive
+            page = self.paginator.paginate_querysets(
+                [queryset, serializer.rows(archive, extra=ordering)], self.request, view=self
+            )
+            return self.get_paginated_response(serializer.serialize(page))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Get a booking, answering conditional requests without serializing"""
+        try:
+            pk = int(kwargs['pk'])
+        except ValueError:
+            raise Http404
+        
+        last_modified = self.get_queryset().filter(
+            pk=pk
+        ).values_list('updated_at', flat=True).first()
+        
+        if last_modified is None:
+            # Not found (or not visible); let the regular path build the 404
+            return super().retrieve(request, *args, **kwargs)
+        
+        return self.conditional_response(
+            request,
+            last_modified,
+            pk,
+            lambda: super(BookingViewSet, self).retrieve(request, *args, **kwargs)
+        )
+    
+    def conditional_response(self, request, last_modified, version, build_response,
+                             send_last_modified=True):
+        """
+        Return 304 when the client's validators still match, else build the response.
+        
+        The ETag covers the requesting user, the full URL (filters and
+        cursor), the negotiated format and a cheap version of the data, so
+        it changes whenever any booking in the result is updated, created
+        or removed.
+        """
+        timestamp = last_modified.isoformat() if last_modified else ''
+        etag = quote_etag(hashlib.md5(
+            f"{request.user.pk}:{request.get_full_path()}:"
+            f"{request.accepted_renderer.format}:{timestamp}:{version}".encode(),
+            usedforsecurity=False
+        ).hexdigest())
+        last_modified_ts = None
+        if send_last_modified and last_modified:
+            last_modified_ts = int(last_modified.timestamp())
+        
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified_ts
+        )
+        if response is None:
+            response = build_response()
+        
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified_ts is not None:
+                response['Last-Modified'] = http_date(last_modified_ts)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
     def perform_create(self, serializer):
         """Set the student to current user when creating booking"""
         serializer.save(student=self.request.user)
     
+    def perform_destroy(self, instance):
+        """Take the booking out of the tutor's stats and offer its slot to the waitlist"""
+        def delete():
+            # Left for the changes feed, which can no longer see the booking
+            BookingTombstone.objects.create(
+                booking_id=instance.pk,
+                student_id=instance.student_id,
+                tutor_id=instance.tutor_id,
+                reason='deleted'
+            )
+            instance.delete()
+            record_deletion(instance)
+            if instance.status in Booking.ACTIVE_STATUSES:
+                promote_waitlist(instance)
+        
+        if instance.status in Booking.ACTIVE_STATUSES:
+            run_reserved(instance.tutor_id, delete)
+        else:
+            with transaction.atomic():
+                delete()
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta-sync feed: bookings created, updated or removed since the client's token.
+        
+        Status changes, including cancellations, bump updated_at and so show
+        up in results. Bookings deleted or moved to the archive are listed
+        under removed. Pass the returned sync_token as ?since= on the next
+        call; keep calling while has_more is true.
+        """
+        ordering = ('updated_at', 'id')
+        tombstone_ordering = ('removed_at', 'booking_id')
+        settled = timezone.now() - timezone.timedelta(seconds=self.CHANGES_SETTLE_SECONDS)
+        queryset = self.get_visible_queryset().filter(updated_at__lte=settled)
+        tombstones = BookingTombstone.objects.filter(removed_at__lte=settled)
+        if not request.user.is_staff:
+            tombstones = tombstones.filter(Q(student_id=request.user.pk) | Q(tutor_id=request.user.pk))
+        
+        since = request.query_params.get('since')
+        if since:
+            try:
+                updated_at, pk = decode_cursor(since)
+                position = [Booking._meta.get_field('updated_at').to_python(updated_at), int(pk)]
+            except (TypeError, ValueError, DjangoValidationError):
+                return Response(
+                    {'error': 'Invalid sync token.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(keyset_filter(ordering, position))
+            tombstones = tombstones.filter(keyset_filter(tombstone_ordering, position))
+        
+        try:
+            limit = int(request.query_params.get('limit', self.CHANGES_PAGE_SIZE))
+        except ValueError:
+            limit = self.CHANGES_PAGE_SIZE
+        limit = max(1, min(limit, self.CHANGES_MAX_PAGE_SIZE))
+        
+        # Both streams share one (timestamp, booking id) position, so one
+        # page is the first `limit` changes of their merge
+        serializer = FlatBookingSerializer(self.get_fieldset())
+        bookings = serializer.rows(queryset.order_by(*ordering), extra=ordering)[:limit + 1]
+        tombstones = tombstones.order_by(*tombstone_ordering).values(
+            'booking_id', 'reason', 'removed_at'
+        )[:limit + 1]
+        changes = sorted(
+            [(row['updated_at'], row['id'], False, row) for row in bookings]
+            + [(row['removed_at'], row['booking_id'], True, row) for row in tombstones],
+            key=lambda change: change[:2]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        
+        if changes:
+            sync_token = encode_cursor(list(changes[-1][:2]))
+        else:
+            sync_token = since or None
+        
+        return Response({
+            'results': serializer.serialize(
+                [row for _, _, removed, row in changes if not removed]
+            ),
+            'removed': [
+                {'id': row['booking_id'], 'reason': row['reason'], 'removed_at': row['removed_at']}
+                for _, _, removed, row in changes if removed
+            ],
+            'sync_token': sync_token,
+            'has_more': has_more,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search over topics, descriptions and reviews, best match first"""
+        params = BookingSearchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        ids = search_bookings(
+            self.get_queryset(),
+            params.validated_data['q'],
+            params.validated_data['limit'],
+            user_id=None if request.user.is_staff else request.user.pk
+        )
+        
+        serializer = FlatBookingSerializer(self.get_fieldset())
+        rows = serializer.rows(Booking.objects.filter(id__in=ids), extra=('id',))
+        position = {booking_id: index for index, booking_id in enumerate(ids)}
+        rows = sorted(rows, key=lambda row: position[row['id']])
+        
+        return Response({'results': serializer.serialize(rows)})
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream bookings as CSV or NDJSON for billing (admin only)"""
+        serializer = BookingExportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        file_format = params['file_format']
+        querysets = get_export_querysets(
+            start=params.get('start'),
+            end=params.get('end'),
+            statuses=params.get('status')
+        )
+        
+        response = StreamingHttpResponse(
+            STREAMS[file_format](querysets),
+            content_type=CONTENT_TYPES[file_format]
+        )
+        filename = f"bookings-{timezone.now():%Y%m%d-%H%M%S}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['post'])
+    def check_availability(self, request):
+        """Check one or many proposed intervals against a tutor's calendar"""
+        serializer = AvailabilityCheckSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            return Response({'results': serializer.get_results()})
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create many sessions, or a recurring series, with one tutor"""
+        serializer = BulkBookingSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = serializer.save(student=request.user)
+        created = sum(1 for result in results if result['created'])
+        
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_409_CONFLICT
+        
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        }, status=response_status)
+    
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update booking status"""
@@ -78,8 +465,38 @@ class BookingViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_403_FORBIDDEN
                     )
             
+            old_status = booking.status
             booking.status = status_value
-            booking.save()
+            
+            def save_status():
+                booking.save()
+                record_status_change(booking, old_status)
+            
+            def reactivate():
+                # The slot may have been taken since the booking was released
+                if not is_tutor_available(
+                    booking.tutor_id, booking.start_time, booking.end_time, [booking.pk]
+                ):
+                    return False
+                save_status()
+                return True
+            
+            def release():
+                save_status()
+                promote_waitlist(booking)
+            
+            if status_value in Booking.ACTIVE_STATUSES and old_status not in Booking.ACTIVE_STATUSES:
+                if not run_reserved(booking.tutor_id, reactivate):
+                    return Response(
+                        {'error': 'Tutor is not available at this time.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            elif status_value == 'cancelled' and old_status in Booking.ACTIVE_STATUSES:
+                # The freed slot goes to the first waitlisted requests that fit
+                run_reserved(booking.tutor_id, release)
+            else:
+                with transaction.atomic():
+                    save_status()
             
             return Response(BookingSerializer(booking).data)
         
@@ -102,20 +519,112 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        booking.student_rating = request.data.get('rating')
-        booking.student_review = request.data.get('review', '')
-        booking.save()
+        serializer = BookingFeedbackSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        old_rating = booking.student_rating
+        booking.student_rating = serializer.validated_data['rating']
+        booking.student_review = serializer.validated_data.get('review', '')
+        with transaction.atomic():
+            booking.save()
+            record_rating_change(booking, old_rating)
         
         return Response(BookingSerializer(booking).data)
 
+class TutorSubjectViewSet(viewsets.ModelViewSet):
+    """ViewSet for the subjects tutors offer"""
+    serializer_class = TutorSubjectSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = TutorSubject.objects.select_related('subject')
+        
+        # Anyone can look up a given tutor's subjects; without a tutor
+        # filter users see their own list and staff see everything
+        tutor_filter = self.request.query_params.get('tutor', None)
+        if tutor_filter:
+            try:
+                tutor_id = int(tutor_filter)
+            except ValueError:
+                raise ValidationError({'tutor': ['A valid integer is required.']})
+            queryset = queryset.filter(tutor_id=tutor_id)
+        elif not user.is_staff:
+            queryset = queryset.filter(tutor_id=user.pk)
+        
+        return queryset
+    
+    def get_permissions(self):
+        if self.action in ['create', 'destroy']:
+            return [IsTutorOrAdmin()]
+        return super().get_permissions()
+    
+    def perform_destroy(self, instance):
+        if instance.tutor != self.request.user and not self.request.user.is_staff:
+            raise PermissionDenied("You can only manage your own subjects.")
+        instance.delete()
+
+class WaitlistViewSet(viewsets.ModelViewSet):
+    """ViewSet for waitlists on taken tutor slots"""
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = WaitlistEntry.objects.select_related(
+            'student__profile', 'tutor__profile', 'subject'
+        )
+        
+        # Students see their own entries and tutors the queue for their slots
+        if not user.is_staff:
+            queryset = queryset.filter(Q(student_id=user.pk) | Q(tutor_id=user.pk))
+        
+        status_filter = self.request.query_params.get('status', None)
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        return with_positions(queryset)
+    
+    def create(self, request, *args, **kwargs):
+        """Join the waitlist for a slot; a free slot is booked straight away"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entry = serializer.save(student=request.user)
+        entry = self.get_queryset().get(pk=entry.pk)
+        return Response(self.get_serializer(entry).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def withdraw(self, request, pk=None):
+        """Leave the waitlist"""
+        entry = self.get_object()
+        if entry.student != request.user and not request.user.is_staff:
+            raise PermissionDenied("Only the student or an admin can withdraw this request.")
+        
+        withdrawn = WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+            status='withdrawn',
+            updated_at=timezone.now()
+        )
+        if not withdrawn:
+            return Response(
+                {'error': 'Only waiting requests can be withdrawn.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(self.get_serializer(self.get_object()).data)
+
 class TutorAvailabilityViewSet(viewsets.ViewSet):
     """ViewSet for tutor availability"""
     permission_classes = [IsAuthenticated]
     
     def list(self, request):
-        """Get available tutors"""
-        from django.contrib.auth.models import User
-        
+        """Get available tutors, served from the versioned listing cache"""
+        data, hit = cache.get_listing(cache.TUTORS, self.build_tutor_listing)
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+    
+    @staticmethod
+    def build_tutor_listing():
         tutors = User.objects.filter(
             profile__tutor_approved=True
         ).select_related('profile')
@@ -130,4 +639,92 @@ class TutorAvailabilityViewSet(viewsets.ViewSet):
                 'academic_year': tutor.profile.academic_year,
             })
         
-        return Response(data)
\ No newline at end of file
+        return data
+    
+    @action(detail=False, methods=['get'])
+    def discover(self, request):
+        """Find approved tutors by subject, academic year and minimum rating"""
+        serializer = TutorDiscoverySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        tutors = User.objects.filter(profile__tutor_approved=True)
+        
+        if 'subject' in params:
+            tutors = tutors.filter(Exists(
+                TutorSubject.objects.filter(tutor=OuterRef('pk'), subject=params['subject'])
+            ))
+        
+        if 'academic_year' in params:
+            tutors = tutors.filter(profile__academic_year=params['academic_year'])
+        
+        if 'min_rating' in params:
+            tutors = tutors.filter(tutor_stats__average_rating__gte=params['min_rating'])
+        
+        # Tutors without any stats yet sort as unrated
+        tutors = tutors.annotate(
+            rating=Coalesce(F('tutor_stats__average_rating'), Value(0.0)),
+            completed_sessions=Coalesce(F('tutor_stats__completed_count'), Value(0)),
+        ).values(
+            'id', 'first_name', 'last_name', 'email', 'profile__academic_year',
+            'rating', 'completed_sessions'
+        )
+        paginator = KeysetPagination(ordering=('-rating', '-id'))
+        page = paginator.paginate_queryset(tutors, request, view=self)
+        
+        data = [
+            {
+                'id': tutor['id'],
+                'name': f"{tutor['first_name']} {tutor['last_name']}",
+                'email': tutor['email'],
+                'academic_year': tutor['profile__academic_year'],
+                'rating': round(tutor['rating'], 2),
+                'completed_sessions': tutor['completed_sessions'],
+            }
+            for tutor in page
+        ]
+        
+        return paginator.get_paginated_response(data)
+    
+    @action(detail=False, methods=['get'])
+    def free_slots(self, request):
+        """Find tutors with a free slot of the given duration in a time window"""
+        serializer = SlotSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        window_start, window_end = params['start'], params['end']
+        duration = timezone.timedelta(minutes=params['duration_minutes'])
+        
+        tutors = User.objects.filter(profile__tutor_approved=True)
+        if 'subject' in params:
+            tutors = tutors.filter(Exists(
+                TutorSubject.objects.filter(tutor=OuterRef('pk'), subject=params['subject'])
+            ))
+        
+        tutors = tutors.values('id', 'first_name', 'last_name', 'email', 'profile__academic_year')
+        results = find_free_slots(tutors, window_start, window_end, duration, params['limit'])
+        
+        data = []
+        for tutor, free in results:
+            data.append({
+                'id': tutor['id'],
+                'name': f"{tutor['first_name']} {tutor['last_name']}",
+                'email': tutor['email'],
+                'academic_year': tutor['profile__academic_year'],
+                'free_slots': [
+                    {'start_time': start_time, 'end_time': end_time}
+                    for start_time, end_time in free
+                ],
+            })
+        
+        return Response(data)
+
+class ListingCacheStatsView(APIView):
+    """Hit/miss counters of the cached tutor and subject listings (admin only)"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(cache.get_stats())
\ No newline at end of file
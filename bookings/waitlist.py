@@ -0,0 +1,117 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.outbox import enqueue_email
+
+from .conflicts import find_conflicts, is_tutor_available
+from .models import Booking, WaitlistEntry
+
+# WaitlistEntry fields copied onto the booking it is promoted to
+BOOKING_FIELDS = (
+    'student_id', 'tutor_id', 'subject_id', 'topic', 'description',
+    'duration_minutes', 'start_time', 'end_time', 'location', 'is_virtual',
+)
+
+
+def book_entry(entry):
+    """Create the pending booking of a waitlist entry and mark it promoted"""
+    booking = Booking(**{field: getattr(entry, field) for field in BOOKING_FIELDS})
+    booking.save()
+    entry.status = 'promoted'
+    entry.booking = booking
+    entry.promoted_at = timezone.now()
+    entry.save()
+    return booking
+
+
+def join_waitlist(entry):
+    """
+    Queue an unsaved entry for its slot, or book it if the slot is free.
+
+    Must run under the tutor's schedule lock (see run_reserved), so the
+    slot cannot be freed between the check and the entry being queued.
+    """
+    if is_tutor_available(entry.tutor_id, entry.start_time, entry.end_time):
+        book_entry(entry)
+    else:
+        entry.save()
+    return entry
+
+
+def promote_waitlist(booking, now=None):
+    """
+    Promote the waiting entries that fit in the slot a booking released.
+
+    Must run under the tutor's schedule lock, in the transaction that
+    cancelled or deleted the booking. Entries overlapping the slot are
+    read in one range scan of the (tutor, status, start_time) index and
+    checked against the tutor's calendar in one more query; in arrival
+    order, every entry that fits is booked as pending. The students
+    passed over are told they are still queued. Returns the promoted
+    entries.
+    """
+    now = now or timezone.now()
+    # Sessions never run longer than MAX_DURATION_MINUTES, which bounds
+    # the start times of entries that can overlap the slot
+    max_duration = timezone.timedelta(minutes=Booking.MAX_DURATION_MINUTES)
+    candidates = list(WaitlistEntry.objects.filter(
+        tutor_id=booking.tutor_id,
+        status='waiting',
+        start_time__gt=max(booking.start_time - max_duration, now),
+        start_time__lt=booking.end_time,
+        end_time__gt=booking.start_time,
+    ).select_related('student', 'tutor').order_by('id'))
+    if not candidates:
+        return []
+
+    conflicts = find_conflicts(
+        booking.tutor_id, [(entry.start_time, entry.end_time) for entry in candidates]
+    )
+    promoted = []
+    for entry, conflicting in zip(candidates, conflicts):
+        if conflicting or any(
+            other.start_time < entry.end_time and entry.start_time < other.end_time
+            for other in promoted
+        ):
+            continue
+        book_entry(entry)
+        promoted.append(entry)
+
+    for entry in candidates:
+        start = timezone.localtime(entry.start_time).strftime('%Y-%m-%d %H:%M')
+        if entry in promoted:
+            enqueue_email(
+                f"waitlist-promoted:{entry.pk}",
+                entry.student.email,
+                "Your waitlisted session is booked",
+                f"Hello {entry.student.first_name},\n"
+                f"A slot opened up and your session \"{entry.topic}\" with "
+                f"{entry.tutor.first_name} at {start} is now booked, pending "
+                f"the tutor's confirmation.\n"
+            )
+        elif promoted:
+            enqueue_email(
+                f"waitlist-passed:{entry.pk}:{promoted[0].pk}",
+                entry.student.email,
+                "You are still on the waitlist",
+                f"Hello {entry.student.first_name},\n"
+                f"A slot near {start} with {entry.tutor.first_name} opened up and "
+                f"went to a student ahead of you in the queue. You are still on "
+                f"the waitlist for \"{entry.topic}\".\n"
+            )
+    return promoted
+
+
+def with_positions(queryset):
+    """Annotate waitlist entries with entries_ahead: earlier waiting entries for an overlapping slot"""
+    max_duration = timezone.timedelta(minutes=Booking.MAX_DURATION_MINUTES)
+    ahead = WaitlistEntry.objects.filter(
+        tutor=OuterRef('tutor'),
+        status='waiting',
+        id__lt=OuterRef('id'),
+        start_time__gt=OuterRef('start_time') - max_duration,
+        start_time__lt=OuterRef('end_time'),
+        end_time__gt=OuterRef('start_time'),
+    ).order_by().values('tutor').annotate(count=Count('id')).values('count')
+    return queryset.annotate(entries_ahead=Coalesce(Subquery(ahead), 0))
@@ -2,6 +2,9 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Password hashing worker processes are started here, before the first login.
+Async views should hash through ``get_hashing_executor().acheck_password`` /
+``amake_password``, which await the pool without blocking the event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -14,3 +17,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from core.hashing import get_hashing_executor  # noqa: E402
+
+get_hashing_executor().warm_up()
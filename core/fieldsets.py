@@ -0,0 +1,177 @@
+from rest_framework import serializers
+
+
+def parse_paths(value):
+    """
+    Parse a comma separated list of dotted paths into a tree.
+
+    'id,tutor.full_name' becomes {'id': None, 'tutor': {'full_name': None}};
+    None marks a name selected as a whole.
+    """
+    tree = {}
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+class Fieldset:
+    """
+    The fields and expansions a client asked for with ?fields= and ?expand=.
+
+    Without ?fields= every field is rendered. Without ?expand= every nested
+    relation is rendered in full, as before; once ?expand= is given only the
+    listed relations are nested and the others are rendered as their id.
+    Selecting a sub-field (tutor.full_name) expands its relation.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """Build the fieldset of a request, or None when it asks for everything"""
+        params = request.query_params
+        if cls.fields_query_param not in params and cls.expand_query_param not in params:
+            return None
+
+        fields = params.get(cls.fields_query_param)
+        expand = params.get(cls.expand_query_param)
+        return cls(
+            fields=parse_paths(fields) if fields is not None else None,
+            expand=parse_paths(expand) if expand is not None else None,
+        )
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        if self.fields is not None and self.fields.get(name):
+            return True
+        return self.expand is None or name in self.expand
+
+    def nested(self, name):
+        """The fieldset applying to the fields of a nested relation"""
+        return Fieldset(
+            fields=self.fields.get(name) if self.fields is not None else None,
+            expand=self.expand.get(name) if self.expand is not None else None,
+        )
+
+    def validate(self, available, expandable=()):
+        """Reject names that are not fields, or relations that cannot be expanded"""
+        errors = {}
+        unknown = sorted(set(self.fields or ()) - set(available))
+        if unknown:
+            errors[self.fields_query_param] = [f"Unknown field: {', '.join(unknown)}"]
+        not_expandable = sorted(set(self.expand or ()) - set(expandable))
+        if not_expandable:
+            errors[self.expand_query_param] = [
+                f"Cannot expand: {', '.join(not_expandable)}"
+            ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin rendering only the fields and expansions of a Fieldset.
+
+    Pass fieldset= when instantiating the serializer. Unrequested fields are
+    dropped and unexpanded nested serializers are replaced by their primary
+    key, so get_fieldset_lookups() can narrow the query to match. Method
+    fields list the model fields they read in Meta.fieldset_sources.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is not None:
+            self.apply_fieldset(fieldset)
+
+    def apply_fieldset(self, fieldset):
+        readable = {
+            name: field for name, field in self.fields.items() if not field.write_only
+        }
+        fieldset.validate(
+            readable,
+            [name for name, field in readable.items()
+             if isinstance(field, serializers.BaseSerializer)]
+        )
+
+        for name, field in readable.items():
+            if not fieldset.includes(name):
+                self.fields.pop(name)
+            elif isinstance(field, serializers.BaseSerializer):
+                if fieldset.expands(name):
+                    if isinstance(field, SparseFieldsetMixin):
+                        field.apply_fieldset(fieldset.nested(name))
+                else:
+                    kwargs = {} if field.source == name else {'source': field.source}
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(
+                        read_only=True, **kwargs
+                    )
+
+    def get_fieldset_lookups(self):
+        """
+        Return the (columns, relations) read by the fields being rendered.
+
+        Use them as queryset.select_related(*relations).only(*columns).
+        """
+        model = self.Meta.model
+        sources = getattr(self.Meta, 'fieldset_sources', {})
+        columns, relations = [], []
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                lookups = sources[name]
+            elif field.source == '*':
+                continue
+            else:
+                lookups = ['__'.join(field.source_attrs)]
+
+            for lookup in lookups:
+                if isinstance(field, SparseFieldsetMixin):
+                    nested_columns, nested_relations = field.get_fieldset_lookups()
+                    relations.append(lookup)
+                    relations.extend(f'{lookup}__{relation}' for relation in nested_relations)
+                    columns.append(f'{lookup}__{field.Meta.model._meta.pk.name}')
+                    columns.extend(f'{lookup}__{column}' for column in nested_columns)
+                elif '__' in lookup:
+                    relations.append(lookup.rsplit('__', 1)[0])
+                    columns.append(lookup)
+                elif not model._meta.get_field(lookup).concrete:
+                    # Reverse one-to-one rendered as its id
+                    related = model._meta.get_field(lookup).related_model
+                    relations.append(lookup)
+                    columns.append(f'{lookup}__{related._meta.pk.name}')
+                else:
+                    columns.append(lookup)
+
+        return columns, relations
+
+    def narrow_queryset(self, queryset, extra=()):
+        """
+        Restrict a queryset to the columns and joins the fieldset needs.
+
+        `extra` names further columns to load, such as the ordering used by
+        the paginator.
+        """
+        columns, relations = self.get_fieldset_lookups()
+        columns.extend(column.lstrip('-') for column in extra)
+        queryset = queryset.select_related(None)
+        if relations:
+            # select_related() without arguments would follow every relation
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
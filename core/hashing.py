@@ -0,0 +1,256 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingOverloaded(APIException):
+    """Raised when too many password hashes are already waiting for a worker"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress, please try again shortly.'
+    default_code = 'hashing_overloaded'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def _use_hashers(hashers):
+    """Hash with the caller's PASSWORD_HASHERS, e.g. under override_settings"""
+    from django.contrib.auth import hashers as auth_hashers
+    if list(hashers) != settings.PASSWORD_HASHERS:
+        settings.PASSWORD_HASHERS = list(hashers)
+        auth_hashers.get_hashers.cache_clear()
+        auth_hashers.get_hashers_by_algorithm.cache_clear()
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _check_password(password, encoded, hashers):
+    """Return (started, valid, must_update) for an encoded password"""
+    from django.contrib.auth.hashers import verify_password
+    started = time.time()
+    _use_hashers(hashers)
+    # must_update when the preferred hasher or its cost has changed
+    valid, must_update = verify_password(password, encoded)
+    return started, valid, must_update
+
+
+def _make_password(password, hashers):
+    """Return (started, encoded password)"""
+    from django.contrib.auth.hashers import make_password
+    started = time.time()
+    _use_hashers(hashers)
+    return started, make_password(password)
+
+
+class HashingExecutor:
+    """
+    Bounded process pool for password hashing.
+
+    PBKDF2 is deliberately slow and holds the GIL, so hashing on request
+    threads lets a burst of logins starve every other request of CPU.
+    Hashes run in `workers` processes instead, and the calling thread or
+    coroutine just waits. At most `max_pending` hashes are admitted at a
+    time; beyond that callers wait up to `admission_timeout` seconds for
+    room and are then turned away with HashingOverloaded (HTTP 503), so
+    the queue, and the latency behind it, stays bounded. With no workers,
+    hashes run inline on the calling thread.
+    """
+
+    def __init__(self, workers, max_pending, admission_timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.admission_timeout = admission_timeout
+        self.pid = os.getpid()
+        self.pool = workers and self._start_pool()
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _start_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Forking a process that runs request threads is unsafe
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'),),
+        )
+
+    def _restart_pool(self, broken):
+        """Replace a pool left unusable by a dead worker (e.g. killed for memory)"""
+        with self.lock:
+            if self.pool is broken:
+                self.pool = self._start_pool()
+                broken.shutdown(wait=False)
+
+    def submit(self, function, *args, block=True):
+        """Admit a hashing call and return its future, or raise HashingOverloaded"""
+        if not self.pool:
+            future = Future()
+            future.set_result(function(*args, tuple(settings.PASSWORD_HASHERS)))
+            return future
+
+        if not self.slots.acquire(blocking=block, timeout=self.admission_timeout if block else None):
+            with self.lock:
+                self.rejected += 1
+            raise HashingOverloaded()
+
+        submitted_at = time.time()
+        with self.lock:
+            self.pending += 1
+            self.submitted += 1
+        pool = self.pool
+        try:
+            try:
+                future = pool.submit(function, *args, tuple(settings.PASSWORD_HASHERS))
+            except BrokenProcessPool:
+                self._restart_pool(pool)
+                future = self.pool.submit(function, *args, tuple(settings.PASSWORD_HASHERS))
+        except Exception:
+            self._finished(None, submitted_at)
+            raise
+        future.add_done_callback(lambda done: self._finished(done, submitted_at))
+        return future
+
+    def _finished(self, future, submitted_at):
+        finished_at = time.time()
+        with self.lock:
+            self.pending -= 1
+            if future is not None and not future.cancelled() and future.exception() is None:
+                started = future.result()[0]
+                self.completed += 1
+                self.queue_seconds += max(0.0, started - submitted_at)
+                self.hash_seconds += max(0.0, finished_at - started)
+        self.slots.release()
+
+    def _run(self, function, *args):
+        """Submit a hashing call and wait for it, retrying once on a new pool if a worker died"""
+        pool = self.pool
+        try:
+            return self.submit(function, *args).result()
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            return self.submit(function, *args).result()
+
+    async def _arun(self, function, *args):
+        pool = self.pool
+        try:
+            return await asyncio.wrap_future(self.submit(function, *args, block=False))
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            return await asyncio.wrap_future(self.submit(function, *args, block=False))
+
+    def check_password(self, password, encoded):
+        """Return (valid, must_update) for an encoded password"""
+        _, valid, must_update = self._run(_check_password, password, encoded)
+        return valid, must_update
+
+    def make_password(self, password):
+        return self._run(_make_password, password)[1]
+
+    def make_passwords(self, passwords, chunksize=16):
+        """
+        Hash many passwords on all workers, in order, for batch jobs.
+
+        Bypasses admission control: a batch would hold every slot, so keep
+        bulk hashing out of processes serving logins.
+        """
+        hashers = tuple(settings.PASSWORD_HASHERS)
+        if not self.pool:
+            return [_make_password(password, hashers)[1] for password in passwords]
+        pool = self.pool
+        try:
+            results = list(pool.map(
+                _make_password, passwords, [hashers] * len(passwords), chunksize=chunksize
+            ))
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            results = self.pool.map(
+                _make_password, passwords, [hashers] * len(passwords), chunksize=chunksize
+            )
+        return [encoded for _, encoded in results]
+
+    async def acheck_password(self, password, encoded):
+        """Async check_password; never blocks the event loop, so a full queue rejects at once"""
+        _, valid, must_update = await self._arun(_check_password, password, encoded)
+        return valid, must_update
+
+    async def amake_password(self, password):
+        return (await self._arun(_make_password, password))[1]
+
+    def check_user_password(self, user, password):
+        """
+        Check a user's password, rehashing it when the hasher settings changed.
+
+        Mirrors User.check_password: a correct password stored with an
+        outdated hasher or iteration count is hashed again with the
+        current settings and saved.
+        """
+        if not user.has_usable_password():
+            # Same work as a real check (see ModelBackend.authenticate)
+            self.make_password(password)
+            return False
+        valid, must_update = self.check_password(password, user.password)
+        if valid and must_update:
+            user.password = self.make_password(password)
+            user.save(update_fields=['password'])
+        return valid
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first login"""
+        if not self.pool:
+            return
+        futures = [self.submit(_make_password, '') for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def stats(self):
+        with self.lock:
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'queued': max(0, self.pending - self.workers),
+                'submitted': self.submitted,
+                'completed': completed,
+                'rejected': self.rejected,
+                'avg_queue_ms': round(self.queue_seconds / completed * 1000, 2) if completed else None,
+                'avg_hash_ms': round(self.hash_seconds / completed * 1000, 2) if completed else None,
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """Return this process's hashing executor, creating it on first use"""
+    global _executor
+    executor = _executor
+    # A forked server worker must not share its parent's pool
+    if executor is None or executor.pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor.pid != os.getpid():
+                _executor = HashingExecutor(
+                    workers=settings.PASSWORD_HASHING_WORKERS,
+                    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+                    admission_timeout=settings.PASSWORD_HASHING_ADMISSION_TIMEOUT,
+                )
+            executor = _executor
+    return executor
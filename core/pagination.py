@@ -0,0 +1,201 @@
+import base64
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _cursor_default(value):
+    # Keep full microsecond precision; DjangoJSONEncoder truncates datetimes
+    # to milliseconds, which would make keyset positions skip rows
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def encode_cursor(payload):
+    """Encode a JSON-serializable payload as an opaque URL-safe token"""
+    data = json.dumps(payload, default=_cursor_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """
+    Build the Q object selecting rows strictly after `position` in `ordering`.
+
+    For an ordering of ('-created_at', '-id') this expands to
+    created_at < v1 OR (created_at = v1 AND id < v2), which the database can
+    answer with a range seek on the matching composite index.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'gt' if descending == reverse else 'lt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over a unique ordering such as (created_at, id).
+
+    Pages are fetched with a range condition on the ordering columns instead
+    of OFFSET, so every page costs the same regardless of its position.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.page = []
+        self.has_next = False
+        self.has_previous = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Paginate the merged rows of several querysets with the same ordering.
+
+        Each queryset is asked for one page from the cursor position through
+        its own index; the merged page is the first page_size rows of their
+        union, so e.g. a hot and an archive table page as one list.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, querysets[0].model)
+        reverse = bool(cursor and cursor['reverse'])
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        rows = []
+        for queryset in querysets:
+            queryset = queryset.order_by(*ordering)
+            if cursor:
+                queryset = queryset.filter(
+                    keyset_filter(self.ordering, cursor['position'], reverse)
+                )
+            rows.extend(queryset[:page_size + 1])
+
+        if len(querysets) > 1:
+            # Stable sorts from the last ordering field to the first
+            for field in reversed(ordering):
+                name = field.lstrip('-')
+                rows.sort(
+                    key=lambda row: row[name] if isinstance(row, dict) else getattr(row, name),
+                    reverse=field.startswith('-')
+                )
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            payload = decode_cursor(token)
+            position = payload['p']
+            if len(position) != len(self.ordering):
+                raise ValueError('Invalid cursor')
+            position = [
+                self._to_python(model, field, value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': bool(payload.get('r'))}
+
+    def get_position(self, row):
+        """Return the ordering values of a model instance or values() dict"""
+        if isinstance(row, dict):
+            return [row[field.lstrip('-')] for field in self.ordering]
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def encode_link(self, row, reverse=False):
+        payload = {'p': self.get_position(row)}
+        if reverse:
+            payload['r'] = 1
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(payload)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_link(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _to_python(model, field, value):
+        try:
+            return model._meta.get_field(field.lstrip('-')).to_python(value)
+        except FieldDoesNotExist:
+            # Annotations have no model field to parse them
+            return value
@@ -77,6 +77,22 @@ DATABASES = {
     }
 }
 
+# Logins through the API authenticate by email; the admin login keeps
+# using usernames through ModelBackend
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Password hashing runs in a pool of worker processes (see core/hashing.py);
+# 0 workers hashes inline. Beyond MAX_PENDING queued hashes, callers wait
+# up to ADMISSION_TIMEOUT seconds for room before getting a 503.
+PASSWORD_HASHING_WORKERS = int(os.environ.get(
+    'PASSWORD_HASHING_WORKERS', max(1, (os.cpu_count() or 2) // 2)
+))
+PASSWORD_HASHING_MAX_PENDING = int(os.environ.get('PASSWORD_HASHING_MAX_PENDING', 32))
+PASSWORD_HASHING_ADMISSION_TIMEOUT = 2
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,10 +129,38 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache (local memory by default; set CACHE_DIR to use a file-based cache
+# shared by all worker processes)
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'campus-connect',
+        }
+    }
+
+# Lifetime of cached tutor/subject listing payloads; they are also
+# invalidated by signals whenever the underlying rows change
+LISTING_CACHE_TIMEOUT = 60 * 60
+
+# Minutes before a confirmed session that its reminder email is sent
+BOOKING_REMINDER_MINUTES = 60
+
+# Finished bookings that ended more than this many days ago are moved to
+# the archive table by the archive_bookings command
+BOOKING_ARCHIVE_AFTER_DAYS = 365
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -144,11 +188,35 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=3),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,  
-    'BLACKLIST_AFTER_ROTATION': True, 
+    # Rotated refresh tokens are revoked by this serializer (accounts/revocation.py);
+    # simplejwt's token_blacklist app, which BLACKLIST_AFTER_ROTATION drives, is not used
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
     'AUTH_HEADER_TYPES': ('Bearer',),
     'SIGNING_KEY': SECRET_KEY, 
 }
 
+# Verified access tokens are remembered per process for this many seconds
+# (at most their own lifetime), sparing a signature check on hot tokens
+JWT_VERIFIED_TOKEN_CACHE_TTL = 60
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# Access tokens carry is_staff/tutor_approved claims that are trusted
+# without loading the user while their version in the cache is current.
+# A local memory cache is per process, so a claims change made in one
+# worker would go unnoticed by the others; the user is loaded instead.
+JWT_TRUST_TOKEN_CLAIMS = (
+    CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+)
+
+# Revoked token ids (logout, refresh rotation) are screened in memory by a
+# Bloom filter sized for this many unexpired revocations per process
+# (about 1.8 MB at a 0.1% false positive rate), and other processes'
+# revocations are picked up within SYNC_INTERVAL seconds
+TOKEN_REVOCATION_CAPACITY = 1000000
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_CACHE_SIZE = 10000
+TOKEN_REVOCATION_SYNC_INTERVAL = 2
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
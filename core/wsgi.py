@@ -2,6 +2,7 @@
 WSGI config for core project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Password hashing worker processes are started here, before the first login.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
@@ -14,3 +15,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from core.hashing import get_hashing_executor  # noqa: E402
+
+get_hashing_executor().warm_up()